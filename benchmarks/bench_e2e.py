@@ -0,0 +1,588 @@
+"""端到端基准: 在本地启动假的 RSSHub / 翻译服务 / Telegram / 飞书，驱动 main.job() 跑完整流程
+
+假服务运行在独立子进程中，不计入机器人进程的 CPU 和内存。
+每轮检查前按 --churn / --churn-ratio 给部分源追加新推文，统计:
+  - 吞吐 (推文/秒)
+  - 从 RSSHub 首次返回某条推文到所有推送目标都收到它的延迟 (p50 / p99)；
+    流式翻译 (--streaming) 时另外统计各目标收到第一条消息 (原文) 的延迟
+  - 机器人进程的 CPU 时间和峰值内存 (ru_maxrss)
+第 0 轮处理的是各源已有的全部推文 (积压)，之后各轮是增量推文，两部分分开统计。
+
+用法 (在项目根目录运行):
+    python benchmarks/bench_e2e.py --feeds 20 --rounds 5 --llm-latency 0.8 --output result.json
+
+结果以 JSON 输出到标准输出 (或 --output 指定的文件)，便于对比不同版本。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TG_TOKEN = "bench-token"
+LINK_PATTERN = re.compile(r"https://x\.com/bench\d+/status/\d+")
+WORDS = (
+    "launch rocket orbit mission update team today thread data model release "
+    "open source engineering benchmark latency throughput".split()
+)
+ZH_WORDS = "发射 火箭 轨道 任务 更新 团队 今天 数据 模型 发布 开源 工程 延迟 吞吐".split()
+
+
+# --- 假服务 (子进程) ---
+
+class FakeState:
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.rng = random.Random(options["seed"])
+        self.feeds = {}
+        self.versions = {}
+        self.next_id = 1
+        self.first_served = {}
+        self.delivered = {}
+        self.first_delivered = {}
+        self.requests = {}
+        self.llm_errors = 0
+        self.message_id = 0
+        for feed in range(options["feeds"]):
+            self.feeds[feed] = []
+            self.versions[feed] = 0
+            self._add_items(feed, options["items"])
+
+    def _add_items(self, feed, count):
+        for _ in range(count):
+            item_id = self.next_id
+            self.next_id += 1
+            if self.rng.random() < self.options["long_ratio"]:
+                # 长文 / 串推: 多段长文本，需要切块翻译并拆成多条 Telegram 消息
+                words = "\n\n".join(
+                    ". ".join(" ".join(self.rng.choice(WORDS) for _ in range(12)) for _ in range(8))
+                    for _ in range(12)
+                )
+            elif self.rng.random() < self.options["chinese_ratio"]:
+                # 已是中文的推文，机器人应跳过翻译
+                words = "".join(self.rng.choice(ZH_WORDS) for _ in range(self.rng.randint(10, 40)))
+            else:
+                words = " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(15, 50)))
+            self.feeds[feed].insert(0, {
+                "id": item_id,
+                "link": f"https://x.com/bench{feed}/status/{item_id}",
+                "text": f"{words} #bench{item_id}",
+                "published": time.time(),
+            })
+        del self.feeds[feed][self.options["items"]:]
+        self.versions[feed] += 1
+
+    def advance(self):
+        with self.lock:
+            feeds = list(self.feeds)
+            changed = self.rng.sample(feeds, max(1, round(len(feeds) * self.options["churn_ratio"])))
+            for feed in changed:
+                self._add_items(feed, self.options["churn"])
+            return len(changed)
+
+    def count(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def record_delivery(self, target, text):
+        # 记录最后一次收到的时间: 正文过长时图片和正文回复分两条发送，回复到达才算推送完成
+        now = time.time()
+        with self.lock:
+            for link in set(LINK_PATTERN.findall(text)):
+                self.delivered.setdefault(link, {})[target] = now
+                self.first_delivered.setdefault(link, {}).setdefault(target, now)
+
+
+def _render_rss(state, feed, base_url):
+    now = time.time()
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0"><channel>',
+        f"<title>bench{feed}</title><link>https://x.com/bench{feed}</link>",
+    ]
+    for item in state.feeds[feed]:
+        state.first_served.setdefault(item["link"], now)
+        images = "".join(
+            f'&lt;img src="{base_url}/img/{item["id"]}_{k}.jpg"&gt;'
+            for k in range(state.options["images"])
+        )
+        parts.append(
+            "<item>"
+            f"<title>{item['text'][:40]}</title>"
+            f"<description>{item['text']}&lt;br&gt;{images}</description>"
+            f"<pubDate>{formatdate(item['published'])}</pubDate>"
+            f"<guid isPermaLink=\"false\">{item['link']}</guid>"
+            f"<link>{item['link']}</link>"
+            f"<author>bench{feed}</author>"
+            "</item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def _fake_translation(prompt):
+    """按提示词返回假译文: 批量请求返回等长的 JSON 数组，单条请求返回文本"""
+    batch = re.search(r"中的 (\d+) 条推特推文", prompt)
+    if batch:
+        return json.dumps([f"译文 {i}" for i in range(int(batch.group(1)))], ensure_ascii=False)
+    return "译文: " + prompt.strip().splitlines()[-1].strip()[:80]
+
+
+def _openai_response(text):
+    return {
+        "id": "resp_bench",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": "bench",
+        "status": "completed",
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "type": "message",
+            "id": "msg_bench",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }
+
+
+def _gemini_response(text):
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+    }
+
+
+def _stream_chunks(text, count=4):
+    size = max(1, -(-len(text) // count))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _make_handler(state):
+    options = state.options
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type="application/json", headers=None):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path.startswith("/rss/"):
+                state.count("rss")
+                feed = int(path.split("/")[2])
+                with state.lock:
+                    etag = f'"v{state.versions[feed]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self._send(304, b"", headers={"ETag": etag})
+                        return
+                    body = _render_rss(state, feed, options["base_url"])
+                self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+            elif path.startswith("/img/"):
+                state.count("image")
+                self._send(200, b"\xff\xd8\xff" + os.urandom(options["image_bytes"]), "image/jpeg")
+            elif path == "/_stats":
+                with state.lock:
+                    data = json.dumps({
+                        "first_served": state.first_served,
+                        "delivered": state.delivered,
+                        "first_delivered": state.first_delivered,
+                        "requests": state.requests,
+                        "llm_errors": state.llm_errors,
+                    }).encode("utf-8")
+                self._send(200, data)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            body = self._read_body()
+
+            if path == "/_advance":
+                self._send(200, {"changed": state.advance()})
+            elif path == "/v1/responses" or ":generateContent" in path or ":streamGenerateContent" in path:
+                self._handle_llm(path, body)
+            elif path.startswith(f"/bot{TG_TOKEN}/"):
+                self._handle_telegram(path.rsplit("/", 1)[1], body)
+            elif path.startswith("/open-apis/"):
+                self._handle_feishu(path, body)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_PATCH(self):
+            path = urlparse(self.path).path
+            body = self._read_body()
+            if path.startswith("/open-apis/im/v1/messages/"):
+                self._handle_feishu(path, body)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _handle_llm(self, path, body):
+            request = json.loads(body or b"{}")
+            streaming = request.get("stream") or ":streamGenerateContent" in path
+            state.count("llm.stream" if streaming else "llm")
+            latency = max(0.0, random.gauss(options["llm_latency"], options["llm_latency"] * 0.25))
+            if random.random() < options["llm_slow_rate"]:
+                # 模拟长尾: 少数请求慢 10 倍
+                latency *= 10
+            # 流式请求的延迟平均分摊到各个分块之间
+            time.sleep(latency / 4 if streaming else latency)
+            if random.random() < options["llm_error_rate"]:
+                with state.lock:
+                    state.llm_errors += 1
+                self._send(503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}})
+                return
+
+            if streaming:
+                self._stream_llm(path, request, latency)
+            elif path == "/v1/responses":
+                prompt = request["input"][0]["content"]
+                self._send(200, _openai_response(_fake_translation(prompt)))
+            else:
+                prompt = request["contents"][0]["parts"][0]["text"]
+                self._send(200, _gemini_response(_fake_translation(prompt)))
+
+        def _stream_llm(self, path, request, latency):
+            """以 SSE 分块返回假译文，响应体以关闭连接结束"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            if path == "/v1/responses":
+                text = _fake_translation(request["input"][0]["content"])
+                chunks = _stream_chunks(text)
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        time.sleep(latency / len(chunks))
+                    event = {
+                        "type": "response.output_text.delta", "item_id": "msg_bench", "output_index": 0,
+                        "content_index": 0, "delta": chunk, "sequence_number": i, "logprobs": [],
+                    }
+                    self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                event = {"type": "response.completed", "response": _openai_response(text), "sequence_number": len(chunks)}
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            else:
+                chunks = _stream_chunks(_fake_translation(request["contents"][0]["parts"][0]["text"]))
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        time.sleep(latency / len(chunks))
+                    self.wfile.write(f"data: {json.dumps(_gemini_response(chunk), ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+
+        def _handle_telegram(self, method, body):
+            state.count(f"telegram.{method}")
+            time.sleep(options["chat_latency"])
+            payload = json.loads(body or b"{}")
+            # 与真实 API 一样拒绝超长的消息和图片说明
+            captions = [payload.get("caption") or ""] + [m.get("caption") or "" for m in payload.get("media") or []]
+            if len(payload.get("text") or "") > 4096 or max(len(c) for c in captions) > 1024:
+                state.count("telegram.too_long")
+                self._send(400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"})
+                return
+            texts = [payload.get("text") or "", payload.get("caption") or ""]
+            texts.extend(media.get("caption") or "" for media in payload.get("media") or [])
+            state.record_delivery("telegram", "\n".join(texts))
+
+            with state.lock:
+                state.message_id += 1
+                message_id = state.message_id
+            if method == "sendMediaGroup":
+                result = [
+                    {"message_id": message_id, "photo": [{"file_id": f"file-{message_id}-{i}"}]}
+                    for i in range(len(payload.get("media") or []))
+                ]
+            elif method == "sendPhoto":
+                result = {"message_id": message_id, "photo": [{"file_id": f"file-{message_id}"}]}
+            else:
+                result = {"message_id": message_id}
+            self._send(200, {"ok": True, "result": result})
+
+        def _handle_feishu(self, path, body):
+            if self.command == "PATCH":
+                # 更新卡片: message_id 形如 om_<receive_id>_<序号>
+                state.count("feishu.update")
+                time.sleep(options["chat_latency"])
+                receive_id = path.rsplit("/", 1)[1][len("om_"):].rsplit("_", 1)[0]
+                payload = json.loads(body or b"{}")
+                state.record_delivery(f"feishu:{receive_id}", payload.get("content") or "")
+                self._send(200, {"code": 0, "data": {}})
+                return
+
+            state.count("feishu." + path.rsplit("/", 1)[1])
+            time.sleep(options["chat_latency"])
+            if path.endswith("/tenant_access_token/internal"):
+                self._send(200, {"code": 0, "tenant_access_token": "bench", "expire": 7200})
+            elif path.endswith("/im/v1/images"):
+                self._send(200, {"code": 0, "data": {"image_key": f"img_{random.getrandbits(32):x}"}})
+            elif path.endswith("/im/v1/messages"):
+                payload = json.loads(body or b"{}")
+                state.record_delivery(f"feishu:{payload.get('receive_id')}", payload.get("content") or "")
+                with state.lock:
+                    state.message_id += 1
+                    message_id = f"om_{payload.get('receive_id')}_{state.message_id}"
+                self._send(200, {"code": 0, "data": {"message_id": message_id}})
+            else:
+                self._send(404, {"code": 404, "msg": "not found"})
+
+    return Handler
+
+
+def _serve(options, port_queue):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), None)
+    options["base_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    server.RequestHandlerClass = _make_handler(FakeState(options))
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+# --- 统计 ---
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return round(values[index], 4)
+
+
+def _phase_summary(name, links, stats, targets, elapsed, cpu):
+    latencies = []
+    first_latencies = []
+    undelivered = 0
+    for link in links:
+        received = stats["delivered"].get(link, {})
+        if not all(target in received for target in targets):
+            undelivered += 1
+            continue
+        latencies.append(max(received[target] for target in targets) - stats["first_served"][link])
+        first_received = stats["first_delivered"][link]
+        first_latencies.append(max(first_received[target] for target in targets) - stats["first_served"][link])
+
+    return {
+        "phase": name,
+        "tweets": len(links),
+        "delivered": len(latencies),
+        "undelivered": undelivered,
+        "seconds": round(elapsed, 3),
+        "tweets_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p99": _percentile(latencies, 99),
+        "latency_max": round(max(latencies), 4) if latencies else None,
+        "first_message_latency_p50": _percentile(first_latencies, 50),
+        "first_message_latency_p99": _percentile(first_latencies, 99),
+        "cpu_seconds": round(cpu, 3),
+    }
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _get_json(url, method="GET"):
+    with urlopen(Request(url, method=method, data=b"" if method == "POST" else None), timeout=30) as response:
+        return json.loads(response.read())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--feeds", type=int, default=10, help="RSS 源数量")
+    parser.add_argument("--items", type=int, default=20, help="每个源返回的推文条数")
+    parser.add_argument("--churn", type=int, default=2, help="每轮给变化的源追加的新推文数")
+    parser.add_argument("--churn-ratio", type=float, default=0.5, help="每轮有新推文的源所占比例")
+    parser.add_argument("--rounds", type=int, default=5, help="积压轮之后的增量轮数")
+    parser.add_argument("--images", type=int, default=1, help="每条推文的图片数")
+    parser.add_argument("--image-bytes", type=int, default=50_000, help="每张假图片的大小")
+    parser.add_argument("--provider", choices=("openai", "gemini"), default="openai")
+    parser.add_argument("--no-translate", action="store_true", help="所有源都不翻译")
+    parser.add_argument("--long-ratio", type=float, default=0.0, help="超长推文 (约 8000 字符) 的比例")
+    parser.add_argument("--chinese-ratio", type=float, default=0.0, help="已是中文 (无需翻译) 的推文比例")
+    parser.add_argument("--streaming", action="store_true", help="开启流式翻译 (先推送原文，再编辑消息)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="假翻译接口的平均延迟 (秒)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="假翻译接口返回 503 的概率")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="假翻译接口响应慢 10 倍的概率 (长尾)")
+    parser.add_argument("--providers", help="AI_PROVIDERS，例如 gemini,openai (默认只用 --provider)")
+    parser.add_argument("--chat-latency", type=float, default=0.02, help="假 Telegram / 飞书接口的延迟 (秒)")
+    parser.add_argument("--channels", default="telegram,feishu")
+    parser.add_argument("--feishu-receivers", type=int, default=2)
+    parser.add_argument(
+        "--rate-limits", choices=("off", "default"), default="off",
+        help="off: 关闭推送和翻译限速，测流水线本身的上限；default: 使用程序默认限速",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果 JSON 写入的文件 (默认输出到标准输出)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    options = {
+        "feeds": args.feeds,
+        "items": args.items,
+        "churn": args.churn,
+        "churn_ratio": args.churn_ratio,
+        "images": args.images,
+        "image_bytes": args.image_bytes,
+        "llm_latency": args.llm_latency,
+        "llm_error_rate": args.llm_error_rate,
+        "llm_slow_rate": args.llm_slow_rate,
+        "chinese_ratio": args.chinese_ratio,
+        "long_ratio": args.long_ratio,
+        "chat_latency": args.chat_latency,
+        "seed": args.seed,
+    }
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(options, port_queue), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+
+    work_dir = tempfile.mkdtemp(prefix="bench-e2e-")
+    try:
+        receivers = [f"ou_bench_{i}" for i in range(args.feishu_receivers)]
+        flag = "F" if args.no_translate else "T"
+        env = {
+            "RSS_URL": ",".join(f"{base_url}/rss/{feed}@{flag}" for feed in range(args.feeds)),
+            "NOTIFY_CHANNELS": args.channels,
+            "TG_BOT_TOKEN": TG_TOKEN,
+            "TG_CHAT_ID": "10000",
+            "TG_API_BASE": base_url,
+            "FEISHU_APP_ID": "cli_bench",
+            "FEISHU_APP_SECRET": "bench",
+            "FEISHU_RECEIVE_IDS": ",".join(receivers),
+            "FEISHU_API_BASE": f"{base_url}/open-apis",
+            "AI_PROVIDER": args.provider,
+            "AI_PROVIDERS": args.providers or args.provider,
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"{base_url}/v1",
+            "GEMINI_API_KEY": "bench",
+            "GEMINI_BASE_URL": base_url,
+            "STATE_DB": os.path.join(work_dir, "state.db"),
+            "STATE_FILE": os.path.join(work_dir, "state.json"),
+            "METRICS_PORT": "0",
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+            "PROXY_URL": "",
+            "STREAMING_TRANSLATION": "true" if args.streaming else "false",
+        }
+        if args.rate_limits == "off":
+            env.update({
+                "TG_GLOBAL_RATE": "0", "TG_CHAT_RATE": "0", "FEISHU_APP_QPS": "0",
+                "FEISHU_RECEIVER_QPS": "0", "GEMINI_RPM": "0", "OPENAI_RPM": "0",
+            })
+        os.environ.update(env)
+
+        # 配置在导入时读取，必须先设置好环境变量
+        sys.path.insert(0, PROJECT_ROOT)
+        import main as bot  # noqa: E402
+
+        targets = []
+        if "telegram" in bot.ENABLED_CHANNELS:
+            targets.append("telegram")
+        if "feishu" in bot.ENABLED_CHANNELS:
+            targets.extend(f"feishu:{receive_id}" for receive_id in receivers)
+
+        phases = []
+        seen_links = set()
+        for round_index in range(args.rounds + 1):
+            if round_index > 0:
+                _get_json(f"{base_url}/_advance", method="POST")
+
+            cpu_started = _cpu_seconds()
+            started = time.perf_counter()
+            bot.job()
+            elapsed = time.perf_counter() - started
+            cpu = _cpu_seconds() - cpu_started
+
+            stats = _get_json(f"{base_url}/_stats")
+            new_links = [link for link in stats["first_served"] if link not in seen_links]
+            seen_links.update(new_links)
+            phases.append((round_index, new_links, elapsed, cpu))
+
+        stats = _get_json(f"{base_url}/_stats")
+        backlog = phases[0]
+        incremental = phases[1:]
+        result = {
+            "benchmark": "e2e",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "options": {key: value for key, value in vars(args).items() if key != "output"},
+            "targets": targets,
+            "backlog": _phase_summary("backlog", backlog[1], stats, targets, backlog[2], backlog[3]),
+            "incremental": _phase_summary(
+                "incremental",
+                [link for _, links, _, _ in incremental for link in links],
+                stats,
+                targets,
+                sum(elapsed for _, _, elapsed, _ in incremental),
+                sum(cpu for _, _, _, cpu in incremental),
+            ),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "server_requests": stats["requests"],
+            "llm_errors_injected": stats["llm_errors"],
+            "outbox": bot.get_outbox_stats(),
+            "translation_skipped": bot.get_translation_skip_stats(),
+        }
+
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+            print(f"结果已写入 {args.output}", file=sys.stderr)
+        else:
+            print(output)
+
+        for phase in (result["backlog"], result["incremental"]):
+            print(
+                f"{phase['phase']:>11}: {phase['delivered']}/{phase['tweets']} 条, "
+                f"{phase['tweets_per_second']} 条/秒, p50 {phase['latency_p50']}s, "
+                f"p99 {phase['latency_p99']}s, CPU {phase['cpu_seconds']}s",
+                file=sys.stderr,
+            )
+    finally:
+        server.terminate()
+        # 状态库、缓存库和媒体缓存都在 work_dir 中，运行结束 (或出错) 后删除
+        shutil.rmtree(work_dir, ignore_errors=True)
+    # 推送线程池不是守护线程，直接退出避免等待
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""推文 HTML 提取的微基准: 对比旧路径 (BeautifulSoup 提取图片 + 每条新建 HTML2Text) 与单次解析路径
+
+用法 (在项目根目录运行):
+    python benchmarks/bench_html_extract.py [条目数] [重复次数]
+
+旧路径需要 beautifulsoup4 (pip install beautifulsoup4)，未安装时只测新路径。
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import html2text  # noqa: E402
+
+from rss_fetcher import html_to_text_and_images  # noqa: E402
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+WORDS = (
+    "launch rocket orbit mission update team today thread data model release "
+    "open source engineering benchmark latency throughput".split()
+)
+
+
+def make_description(rng):
+    """生成与 RSSHub Twitter 输出结构相近的推文 HTML"""
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))
+    parts = [
+        f"{words}<br>",
+        f'<a href="https://x.com/user{rng.randint(1, 999)}">@user{rng.randint(1, 999)}</a> ',
+        f'<a href="https://t.co/{rng.randint(10**6, 10**7)}">https://t.co/xyz</a><br>',
+    ]
+    for i in range(rng.randint(0, 4)):
+        parts.append(
+            f'<img style="" src="https://pbs.twimg.com/media/{rng.randint(10**8, 10**9)}_{i}.jpg" '
+            'referrerpolicy="no-referrer"><br>'
+        )
+    if rng.random() < 0.3:
+        parts.append(
+            '<div class="rsshub-quote"><br><br>引用推文: '
+            f'{words[:80]}<br><img src="https://pbs.twimg.com/media/q{rng.randint(1, 999)}.jpg"></div>'
+        )
+    return "".join(parts)
+
+
+def legacy_extract(description):
+    """改造前 fetch_new_tweets 中的实现"""
+    images = []
+    soup = BeautifulSoup(description, 'html.parser')
+    for img in soup.find_all('img'):
+        if hasattr(img, 'get'):
+            src = img.get('src')
+            if src:
+                images.append(src)
+
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.body_width = 0
+    h.ignore_images = True
+    return h.handle(description).strip(), images
+
+
+def run(func, descriptions, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for description in descriptions:
+            func(description)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(42)
+    descriptions = [make_description(rng) for _ in range(count)]
+
+    if BeautifulSoup is not None:
+        # 先确认两条路径输出一致
+        for description in descriptions:
+            if legacy_extract(description) != html_to_text_and_images(description):
+                print("警告: 新旧路径输出不一致")
+                break
+
+    print(f"条目数: {count}, 重复: {repeat} 次 (取最快一次)")
+    new_time = run(html_to_text_and_images, descriptions, repeat)
+    print(f"单次解析:  {new_time * 1000:8.1f} ms  ({new_time / count * 1e6:7.1f} us/条)")
+
+    if BeautifulSoup is None:
+        print("未安装 beautifulsoup4，跳过旧路径对比")
+        return
+
+    old_time = run(legacy_extract, descriptions, repeat)
+    print(f"旧路径:    {old_time * 1000:8.1f} ms  ({old_time / count * 1e6:7.1f} us/条)")
+    print(f"加速比:    {old_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
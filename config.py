@@ -1,9 +1,23 @@
+import logging
 import os
 from dotenv import load_dotenv
 
+from log_config import setup_logging
+
 # 加载环境变量
 load_dotenv()
 
+# 日志配置 (在其他配置之前完成，保证后续所有模块的日志格式一致)
+# LOG_LEVEL: DEBUG / INFO / WARNING / ERROR，逐条推文的处理细节在 DEBUG 级别
+# LOG_FORMAT: text (默认) 或 json (每行一个 JSON 对象，带 feed / link / channel 等上下文字段)
+# LOG_QUEUE_ENABLED: 日志先写入内存队列，由后台线程输出，避免 I/O 阻塞抓取和推送线程
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_ENABLED)
+
+logger = logging.getLogger(__name__)
+
 # 获取配置
 # 支持多个 RSS URL，使用逗号分隔
 # 格式: URL@T (翻译) 或 URL@F (不翻译)，默认开启翻译
@@ -40,11 +54,142 @@ GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
 AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini").lower()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+# AI_PROVIDERS: 参与翻译路由的服务商 (逗号分隔，按优先顺序)，默认只使用 AI_PROVIDER；未配置 API Key 的会被忽略
+# GEMINI_MODEL / OPENAI_MODEL: 各服务商使用的模型
+AI_PROVIDERS = list(dict.fromkeys(
+    p.strip().lower() for p in os.getenv("AI_PROVIDERS", AI_PROVIDER).split(",") if p.strip()
+))
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5.2")
 TG_BOT_TOKEN = os.getenv("TG_BOT_TOKEN")
 TG_CHAT_ID = os.getenv("TG_CHAT_ID")
+# Telegram Bot API 地址，可指向自建 Bot API 服务或反向代理
+TG_API_BASE = os.getenv("TG_API_BASE", "https://api.telegram.org").rstrip("/")
+# 多图推文使用 sendMediaGroup 以相册形式一次发送 (最多 10 张)，关闭时只发第一张
+TG_MEDIA_GROUP_ENABLED = os.getenv("TG_MEDIA_GROUP_ENABLED", "true").lower() in ("1", "true", "yes")
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "1800"))
 PROXY_URL = os.getenv("PROXY_URL")
 
+# 自适应轮询: 根据每个源最近的发帖时间估计发帖间隔，活跃的源轮询更频繁，沉寂的源逐渐放缓
+# 轮询间隔 = 预计发帖间隔 x POLL_ADAPT_FACTOR，限制在 [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL] 内，
+# 并加上 ±POLL_JITTER 的随机抖动，避免所有源同时请求；没有历史数据的源使用 CHECK_INTERVAL
+# 关闭 ADAPTIVE_POLLING 时所有源都按 CHECK_INTERVAL 轮询
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "true").lower() in ("1", "true", "yes")
+POLL_MIN_INTERVAL = max(10, int(os.getenv("POLL_MIN_INTERVAL", str(min(300, CHECK_INTERVAL)))))
+POLL_MAX_INTERVAL = max(POLL_MIN_INTERVAL, int(os.getenv("POLL_MAX_INTERVAL", str(CHECK_INTERVAL * 4))))
+POLL_ADAPT_FACTOR = max(0.01, float(os.getenv("POLL_ADAPT_FACTOR", "0.25")))
+POLL_JITTER = min(0.5, max(0.0, float(os.getenv("POLL_JITTER", "0.1"))))
+# 每个源保留的最近发帖时间数量
+POLL_HISTORY_SIZE = max(2, int(os.getenv("POLL_HISTORY_SIZE", "20")))
+
+# HTTP 连接池配置
+# HTTP_POOL_CONNECTIONS: 缓存连接池的主机数量
+# HTTP_POOL_MAXSIZE: 每个主机保持的最大连接数
+# HTTP2_ENABLED: 安装了 httpx[http2] 时使用 HTTP/2 (同一主机多路复用一条连接)
+HTTP_POOL_CONNECTIONS = max(1, int(os.getenv("HTTP_POOL_CONNECTIONS", "20")))
+HTTP_POOL_MAXSIZE = max(1, int(os.getenv("HTTP_POOL_MAXSIZE", "16")))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Prometheus 指标服务 (GET /metrics)，METRICS_PORT=0 表示关闭
+# 在 Docker 中需要被外部抓取时把 METRICS_HOST 设为 0.0.0.0 并映射端口
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# 状态存储配置
+# STATE_BACKEND: sqlite (默认，WAL 模式) 或 json
+# STATE_FILE: 旧版 state.json 路径，sqlite 模式下首次启动会自动迁移
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite").lower()
+STATE_FILE = os.getenv("STATE_FILE", "state.json")
+STATE_DB = os.getenv("STATE_DB") or os.path.join(os.path.dirname(STATE_FILE), "state.db")
+
+# 推送发件箱: 翻译后的推文先落盘，全部目标推送成功后才推进进度，失败的目标后台按指数退避重试
+# OUTBOX_DB: 发件箱数据库，默认与状态共用 STATE_DB
+# OUTBOX_MAX_ATTEMPTS: 每个目标最多尝试次数，超过后放弃 (标记为 dead)
+# OUTBOX_BACKOFF_BASE / OUTBOX_BACKOFF_MAX: 重试间隔 (秒)，每次失败翻倍，不超过上限
+# OUTBOX_RETRY_INTERVAL: 后台重试线程检查到期任务的间隔 (秒)
+OUTBOX_DB = os.getenv("OUTBOX_DB") or STATE_DB
+OUTBOX_MAX_ATTEMPTS = max(1, int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")))
+OUTBOX_BACKOFF_BASE = max(1.0, float(os.getenv("OUTBOX_BACKOFF_BASE", "30")))
+OUTBOX_BACKOFF_MAX = max(OUTBOX_BACKOFF_BASE, float(os.getenv("OUTBOX_BACKOFF_MAX", "3600")))
+OUTBOX_RETRY_INTERVAL = max(1.0, float(os.getenv("OUTBOX_RETRY_INTERVAL", "15")))
+
+# 缓存数据库 (翻译缓存、媒体索引)，默认与 STATE_DB 同目录
+CACHE_DB = os.getenv("CACHE_DB") or os.path.join(os.path.dirname(STATE_DB), "cache.db")
+
+# 媒体缓存配置
+# MEDIA_CACHE_DIR: 图片文件的缓存目录 (按内容 sha256 命名)
+# MEDIA_CACHE_MAX_BYTES: 缓存目录总大小上限，超出后淘汰最久未使用的文件，默认 256MB
+MEDIA_CACHE_ENABLED = os.getenv("MEDIA_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR") or os.path.join(os.path.dirname(STATE_DB), "media_cache")
+MEDIA_CACHE_MAX_BYTES = max(0, int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
+
+# 翻译缓存配置
+# TRANSLATION_CACHE_TTL: 缓存有效期 (秒)，默认 30 天，0 表示不过期
+# TRANSLATION_CACHE_MAX_ENTRIES: 最多缓存的翻译条数，超出后淘汰最久未使用的条目
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB") or CACHE_DB
+TRANSLATION_CACHE_TTL = max(0, int(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600))))
+TRANSLATION_CACHE_MAX_ENTRIES = max(0, int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000")))
+
+# 跳过翻译配置 (本地判断，不调用 AI 接口)
+# TRANSLATION_SKIP_ENABLED: 已是中文、没有文字 (纯链接 / emoji / @提及 / 纯图片) 或文字过短的推文不翻译
+# TRANSLATION_SKIP_CHINESE_RATIO: 去掉链接、@提及和 #标签后汉字占文字的比例 (每两个汉字折算为一个词，其他文字按单词计) 达到该值视为中文
+# TRANSLATION_SKIP_MIN_LETTERS: 文字少于该字数时不翻译
+TRANSLATION_SKIP_ENABLED = os.getenv("TRANSLATION_SKIP_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSLATION_SKIP_CHINESE_RATIO = min(1.0, max(0.0, float(os.getenv("TRANSLATION_SKIP_CHINESE_RATIO", "0.5"))))
+TRANSLATION_SKIP_MIN_LETTERS = max(0, int(os.getenv("TRANSLATION_SKIP_MIN_LETTERS", "3")))
+
+# 翻译流水线配置
+# TRANSLATE_WORKERS: 并发翻译线程数
+# DELIVER_WORKERS: 并发推送线程数 (同一 RSS 源的推文始终按顺序推送)
+# GEMINI_RPM / OPENAI_RPM: 各服务商每分钟最多请求数，0 表示不限速
+TRANSLATE_WORKERS = max(1, int(os.getenv("TRANSLATE_WORKERS", "4")))
+DELIVER_WORKERS = max(1, int(os.getenv("DELIVER_WORKERS", "8")))
+GEMINI_RPM = max(0, int(os.getenv("GEMINI_RPM", "60")))
+OPENAI_RPM = max(0, int(os.getenv("OPENAI_RPM", "60")))
+
+# 对冲请求配置
+# TRANSLATION_HEDGE_ENABLED: 首选服务商的请求超过其近期 p95 延迟仍未返回时，向下一个服务商
+#   (只有一个服务商时为同一个) 再发一个请求，先成功的结果胜出
+# TRANSLATION_HEDGE_MIN_DELAY / TRANSLATION_HEDGE_MAX_DELAY: 对冲等待时间的下限 / 上限 (秒)，样本不足时按上限等待
+# PROVIDER_STATS_WINDOW: 统计各服务商延迟和错误率的滚动窗口 (秒)
+TRANSLATION_HEDGE_ENABLED = os.getenv("TRANSLATION_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSLATION_HEDGE_MIN_DELAY = max(0.0, float(os.getenv("TRANSLATION_HEDGE_MIN_DELAY", "1")))
+TRANSLATION_HEDGE_MAX_DELAY = max(TRANSLATION_HEDGE_MIN_DELAY, float(os.getenv("TRANSLATION_HEDGE_MAX_DELAY", "15")))
+PROVIDER_STATS_WINDOW = max(1, int(os.getenv("PROVIDER_STATS_WINDOW", "300")))
+
+# 批量翻译配置
+# TRANSLATION_BATCH_TOKEN_BUDGET: 单次批量请求的输入 token 预算 (估算值)
+# TRANSLATION_BATCH_MAX_ITEMS: 单次批量请求最多包含的推文条数，设为 1 即关闭批量翻译
+TRANSLATION_BATCH_TOKEN_BUDGET = max(1, int(os.getenv("TRANSLATION_BATCH_TOKEN_BUDGET", "6000")))
+TRANSLATION_BATCH_MAX_ITEMS = max(1, int(os.getenv("TRANSLATION_BATCH_MAX_ITEMS", "20")))
+# TRANSLATION_CHUNK_CHARS: 超过该字数的长推文 (长文 / 串推) 按段落和句子切块并发翻译，且不参与批量翻译
+TRANSLATION_CHUNK_CHARS = max(200, int(os.getenv("TRANSLATION_CHUNK_CHARS", "2000")))
+
+# 流式翻译配置
+# STREAMING_TRANSLATION: 开启后先推送原文 (译文处显示占位提示)，再通过服务商的流式接口翻译并原地编辑已发送的消息
+# STREAM_EDIT_INTERVAL: 流式翻译过程中两次编辑消息的最小间隔 (秒)，译文完成后的最终编辑不受限制
+STREAMING_TRANSLATION = os.getenv("STREAMING_TRANSLATION", "false").lower() in ("1", "true", "yes")
+STREAM_EDIT_INTERVAL = max(0.0, float(os.getenv("STREAM_EDIT_INTERVAL", "1.5")))
+
+# 去重配置
+# SEEN_HISTORY_SIZE: 每个 RSS 源保留的最近已处理推文 ID 数量 (LRU)
+# SEEN_BLOOM_BITS: 大于 0 时，被淘汰的 ID 写入该位数的布隆过滤器，用于覆盖更长的历史
+SEEN_HISTORY_SIZE = max(1, int(os.getenv("SEEN_HISTORY_SIZE", "500")))
+SEEN_BLOOM_BITS = max(0, int(os.getenv("SEEN_BLOOM_BITS", "0")))
+
+# 增量解析配置
+# LAZY_PARSE_ENABLED: 对 RSS 2.0 文档增量解析，只为新推文构造条目
+# LAZY_PARSE_STOP_AFTER_SEEN: 连续遇到多少条已处理的推文后停止解析 (容忍置顶推文等乱序)
+LAZY_PARSE_ENABLED = os.getenv("LAZY_PARSE_ENABLED", "true").lower() in ("1", "true", "yes")
+LAZY_PARSE_STOP_AFTER_SEEN = max(1, int(os.getenv("LAZY_PARSE_STOP_AFTER_SEEN", "3")))
+
+# 并发抓取配置
+# FETCH_CONCURRENCY: 同时处理的 RSS 源数量上限
+# HOST_CONCURRENCY: 同一 RSSHub 主机的并发请求上限，避免压垮自建实例
+FETCH_CONCURRENCY = max(1, int(os.getenv("FETCH_CONCURRENCY", "16")))
+HOST_CONCURRENCY = max(1, int(os.getenv("HOST_CONCURRENCY", "4")))
+
 
 def parse_csv(value):
     return [item.strip() for item in value.split(",") if item.strip()]
@@ -62,6 +207,17 @@ FEISHU_RECEIVE_ID_TYPE = os.getenv("FEISHU_RECEIVE_ID_TYPE", "chat_id")
 FEISHU_RECEIVE_IDS = parse_csv(os.getenv("FEISHU_RECEIVE_IDS", ""))
 FEISHU_API_BASE = os.getenv("FEISHU_API_BASE", "https://open.feishu.cn/open-apis")
 
+# 推送限速 (每秒请求数)，默认取各平台公开的速率上限
+# TG_GLOBAL_RATE: Telegram Bot 全局; TG_CHAT_RATE: 单个聊天
+# FEISHU_APP_QPS: 飞书单个应用; FEISHU_RECEIVER_QPS: 飞书单个接收者
+TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "30"))
+TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", "1"))
+FEISHU_APP_QPS = float(os.getenv("FEISHU_APP_QPS", "50"))
+FEISHU_RECEIVER_QPS = float(os.getenv("FEISHU_RECEIVER_QPS", "5"))
+
+# 并发推送线程数: 同一条推文同时发往所有渠道和飞书接收者
+NOTIFY_CONCURRENCY = max(1, int(os.getenv("NOTIFY_CONCURRENCY", "16")))
+
 
 def build_enabled_channels():
     enabled = []
@@ -69,7 +225,7 @@ def build_enabled_channels():
 
     for channel in NOTIFY_CHANNELS:
         if channel not in ("telegram", "feishu"):
-            print(f"警告: 不支持的通知渠道 '{channel}'，已忽略")
+            logger.warning("不支持的通知渠道 '%s'，已忽略", channel)
             continue
 
         if channel in requested:
@@ -81,13 +237,13 @@ def build_enabled_channels():
             if TG_BOT_TOKEN and TG_CHAT_ID:
                 enabled.append(channel)
             else:
-                print("警告: Telegram 渠道未完整配置，已跳过 (需 TG_BOT_TOKEN + TG_CHAT_ID)")
+                logger.warning("Telegram 渠道未完整配置，已跳过 (需 TG_BOT_TOKEN + TG_CHAT_ID)")
         elif channel == "feishu":
             if FEISHU_APP_ID and FEISHU_APP_SECRET and FEISHU_RECEIVE_IDS:
                 enabled.append(channel)
             else:
-                print(
-                    "警告: 飞书渠道未完整配置，已跳过 "
+                logger.warning(
+                    "飞书渠道未完整配置，已跳过 "
                     "(需 FEISHU_APP_ID + FEISHU_APP_SECRET + FEISHU_RECEIVE_IDS)"
                 )
 
@@ -98,12 +254,12 @@ ENABLED_CHANNELS = build_enabled_channels()
 
 # 简单校验
 if not RSS_CONFIGS:
-    print("错误: 请在 .env 文件中配置 RSS_URL (格式: URL@T,URL@F)")
+    logger.error("请在 .env 文件中配置 RSS_URL (格式: URL@T,URL@F)")
 if any(config["translate"] for config in RSS_CONFIGS):
-    if AI_PROVIDER == "gemini" and not GEMINI_API_KEY:
-        print("错误: 检测到开启翻译的 RSS 源，由于使用 gemini 模型，但未配置 GEMINI_API_KEY")
-    elif AI_PROVIDER == "openai" and not OPENAI_API_KEY:
-        print("错误: 检测到开启翻译的 RSS 源，由于使用 openai 模型，但未配置 OPENAI_API_KEY")
+    if "gemini" in AI_PROVIDERS and not GEMINI_API_KEY:
+        logger.error("检测到开启翻译的 RSS 源，由于使用 gemini 模型，但未配置 GEMINI_API_KEY")
+    if "openai" in AI_PROVIDERS and not OPENAI_API_KEY:
+        logger.error("检测到开启翻译的 RSS 源，由于使用 openai 模型，但未配置 OPENAI_API_KEY")
 
 if not ENABLED_CHANNELS:
-    print("错误: 没有可用的通知渠道，请检查 NOTIFY_CHANNELS 及对应配置")
+    logger.error("没有可用的通知渠道，请检查 NOTIFY_CHANNELS 及对应配置")
@@ -0,0 +1,204 @@
+import ipaddress
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP2_ENABLED, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, PROXY_URL
+from metrics import counter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+# 共享的 HTTP 会话: 按 (是否走代理, 是否 HTTP/2) 区分，
+# 同一主机的请求复用连接池中的长连接，省去每次 TCP + TLS 握手
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+# 按主机统计的请求数 (HTTP/2 客户端没有连接池计数，只能靠这里)
+_REQUEST_COUNTS = {}
+_REQUEST_COUNTS_LOCK = threading.Lock()
+
+
+def get_proxy_dict():
+    if PROXY_URL:
+        return {"http": PROXY_URL, "https": PROXY_URL}
+    return None
+
+
+def is_private_url(url):
+    """检查 URL 是否指向私有 IP 地址 (内网)"""
+    try:
+        parsed = urlparse(url)
+        hostname = parsed.hostname
+        if not hostname:
+            return False
+
+        # 常见本地标识
+        if hostname.lower() == 'localhost':
+            return True
+
+        # 尝试判断是否为 IP 地址
+        try:
+            ip = ipaddress.ip_address(hostname)
+            return ip.is_private
+        except ValueError:
+            # 不是 IP 地址 (可能是域名)，暂不视为私有地址
+            return False
+    except Exception:
+        return False
+
+
+def _http2_available():
+    if not HTTP2_ENABLED or httpx is None:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_requests_session(use_proxy):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if use_proxy:
+        session.proxies.update(get_proxy_dict() or {})
+    return session
+
+
+def _create_httpx_client(use_proxy):
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+        max_keepalive_connections=HTTP_POOL_MAXSIZE,
+    )
+    return httpx.Client(
+        http2=True,
+        proxy=PROXY_URL if use_proxy else None,
+        limits=limits,
+        follow_redirects=True,
+    )
+
+
+def get_session(url):
+    """获取访问该 URL 应使用的共享会话 (内网地址不走代理)"""
+    use_proxy = bool(PROXY_URL) and not is_private_url(url)
+    use_http2 = _http2_available()
+    key = (use_proxy, use_http2)
+
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            if use_http2:
+                session = _create_httpx_client(use_proxy)
+            else:
+                session = _create_requests_session(use_proxy)
+            _SESSIONS[key] = session
+        return session
+
+
+def _count_request(url):
+    host = urlparse(url).netloc.lower()
+    with _REQUEST_COUNTS_LOCK:
+        _REQUEST_COUNTS[host] = _REQUEST_COUNTS.get(host, 0) + 1
+
+
+def request(method, url, **kwargs):
+    """通过共享连接池发送请求，参数与 requests.request 相同 (不支持 proxies)"""
+    _count_request(url)
+    return get_session(url).request(method, url, **kwargs)
+
+
+@contextmanager
+def stream(method, url, chunk_size=64 * 1024, **kwargs):
+    """流式请求，产出 (响应, 响应体分块迭代器)，退出时释放连接"""
+    _count_request(url)
+    session = get_session(url)
+    if isinstance(session, requests.Session):
+        response = session.request(method, url, stream=True, **kwargs)
+        try:
+            yield response, response.iter_content(chunk_size)
+        finally:
+            response.close()
+    else:
+        with session.stream(method, url, **kwargs) as response:
+            yield response, response.iter_bytes(chunk_size)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def _iter_urllib3_pools(adapter):
+    managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+    for manager in managers:
+        if manager is None:
+            continue
+        pools = manager.pools
+        with pools.lock:
+            keys = list(pools.keys())
+        for key in keys:
+            pool = pools.get(key)
+            if pool is not None:
+                yield pool
+
+
+def get_pool_stats():
+    """返回连接池统计: 每个主机的请求数、新建连接数，用于确认连接复用情况"""
+    stats = {}
+    with _REQUEST_COUNTS_LOCK:
+        for host, count in _REQUEST_COUNTS.items():
+            stats[host] = {"requests": count, "connections": None}
+
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+
+    for session in sessions:
+        if not isinstance(session, requests.Session):
+            continue
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            if not isinstance(adapter, HTTPAdapter):
+                continue
+            for pool in _iter_urllib3_pools(adapter):
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                entry = stats.setdefault(host.lower(), {"requests": 0, "connections": None})
+                entry["connections"] = (entry["connections"] or 0) + pool.num_connections
+
+    return stats
+
+
+def format_pool_stats():
+    stats = get_pool_stats()
+    if not stats:
+        return "无"
+    parts = []
+    for host, entry in sorted(stats.items()):
+        connections = "-" if entry["connections"] is None else entry["connections"]
+        parts.append(f"{host} 请求 {entry['requests']} / 新建连接 {connections}")
+    return "; ".join(parts)
+
+
+counter(
+    "rss_bot_http_requests_total", "经共享连接池发出的 HTTP 请求数", ["host"],
+    collect=lambda: {(host,): entry["requests"] for host, entry in get_pool_stats().items()},
+)
+counter(
+    "rss_bot_http_connections_total", "连接池累计新建的连接数 (HTTP/2 客户端不统计)", ["host"],
+    collect=lambda: {
+        (host,): entry["connections"]
+        for host, entry in get_pool_stats().items()
+        if entry["connections"] is not None
+    },
+)
@@ -0,0 +1,89 @@
+import re
+import unicodedata
+
+from config import TRANSLATION_SKIP_CHINESE_RATIO, TRANSLATION_SKIP_MIN_LETTERS
+
+# 推文正文是 html2text 转出的 Markdown: 链接为 [文字](URL)，图片已单独提取
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"(?:https?://|www\.)\S+")
+# @提及 和 #标签 翻译时原样保留，不算作需要翻译的文字
+_MENTION_OR_TAG = re.compile(r"[@#＃]\w+")
+
+# 日文假名和韩文谚文占比超过该值时按外语处理 (日文中也有大量汉字)
+_KANA_HANGUL_RATIO = 0.05
+# 中文词语平均约两个汉字: 每两个汉字折算为一个单词，与其他文字的单词数比较
+_HAN_CHARS_PER_WORD = 2
+
+
+def _is_han(char):
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF
+        or 0x3400 <= code <= 0x4DBF
+        or 0xF900 <= code <= 0xFAFF
+        or 0x20000 <= code <= 0x2FA1F
+    )
+
+
+def _is_kana_or_hangul(char):
+    code = ord(char)
+    return (
+        0x3040 <= code <= 0x30FF
+        or 0x31F0 <= code <= 0x31FF
+        or 0xAC00 <= code <= 0xD7AF
+        or 0x1100 <= code <= 0x11FF
+        or 0x3130 <= code <= 0x318F
+    )
+
+
+def _strip_untranslatable(text):
+    """去掉链接、@提及、#标签，只留下需要翻译的文字"""
+    text = _MARKDOWN_LINK.sub(r"\1", text)
+    text = _URL.sub(" ", text)
+    return _MENTION_OR_TAG.sub(" ", text)
+
+
+def _is_letter(char):
+    # Unicode 字母类 (含汉字、假名)，不含数字、标点和 emoji
+    return unicodedata.category(char).startswith("L")
+
+
+def skip_translation_reason(content):
+    """本地判断推文是否无需翻译 (不依赖网络或模型)
+
+    返回跳过的原因，需要翻译时返回 None:
+      empty: 没有文字 (纯图片、纯链接、只有 emoji / @提及 / #标签)
+      chinese: 正文已是中文 (汉字折算的词数占比达到 TRANSLATION_SKIP_CHINESE_RATIO，且几乎没有假名和谚文)
+      short: 文字少于 TRANSLATION_SKIP_MIN_LETTERS 个 (如 "gm")
+    """
+    text = _strip_untranslatable(content or "")
+    letters = 0
+    han = 0
+    kana_hangul = 0
+    # 汉字按字数折算为词数，其他文字按单词计数: 中文里夹杂的英文单词不会拉低中文占比，
+    # 英文里提到的中文人名、术语也不会让整条推文被当成中文
+    words = 0
+    in_word = False
+    for char in text:
+        if not _is_letter(char):
+            in_word = False
+            continue
+        letters += 1
+        if _is_han(char):
+            han += 1
+            in_word = False
+            continue
+        if _is_kana_or_hangul(char):
+            kana_hangul += 1
+        if not in_word:
+            words += 1
+            in_word = True
+
+    if not letters:
+        return "empty"
+    han_words = han / _HAN_CHARS_PER_WORD
+    if han_words / (han_words + words) >= TRANSLATION_SKIP_CHINESE_RATIO and kana_hangul / letters < _KANA_HANGUL_RATIO:
+        return "chinese"
+    if letters < TRANSLATION_SKIP_MIN_LETTERS:
+        return "short"
+    return None
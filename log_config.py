@@ -0,0 +1,89 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# LogRecord 自带的属性，其余属性都是调用方通过 extra 传入的上下文字段 (feed / link / channel 等)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_LISTENER = None
+
+
+def _context_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED_ATTRS}
+
+
+class JSONFormatter(logging.Formatter):
+    """每条日志输出一行 JSON: 时间、级别、模块、消息及上下文字段"""
+
+    def format(self, record):
+        data = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update(_context_fields(record))
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """便于人工阅读的单行格式，上下文字段以 key=value 附在末尾"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _context_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def setup_logging(level="INFO", fmt="text", use_queue=False):
+    """配置根日志记录器 (重复调用会替换之前的配置)
+
+    level: DEBUG / INFO / WARNING / ERROR
+    fmt: json 或 text
+    use_queue: 通过 QueueHandler 把日志写入内存队列，由后台线程输出，抓取和推送线程不会阻塞在 I/O 上
+    """
+    global _LISTENER
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _LISTENER = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _LISTENER.start()
+        # 退出前把队列中剩余的日志写完
+        atexit.register(_stop_listener)
+    else:
+        root.addHandler(handler)
+
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    # 第三方库的请求日志过于冗长，只保留警告
+    for name in ("urllib3", "httpx", "httpcore", "google_genai", "openai"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _stop_listener():
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
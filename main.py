@@ -1,97 +1,214 @@
+import logging
+import os
 import time
-import schedule
 import signal
-import sys
-from config import CHECK_INTERVAL, RSS_CONFIGS, ENABLED_CHANNELS, AI_PROVIDER, PROXY_URL
-from rss_fetcher import fetch_new_tweets, save_last_link
-from translator import translate_tweet
-from notifier import send_telegram_message, send_plain_message
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+from config import (
+    CHECK_INTERVAL,
+    RSS_CONFIGS,
+    ENABLED_CHANNELS,
+    AI_PROVIDERS,
+    PROXY_URL,
+    FETCH_CONCURRENCY,
+    HOST_CONCURRENCY,
+    METRICS_HOST,
+    METRICS_PORT,
+)
+from rss_fetcher import fetch_new_tweets, get_fetch_stats
+from translator import get_provider_stats, get_translation_cache_stats, get_translation_skip_stats
+from notifier import send_plain_message
+from pipeline import get_outbox_stats, start_retry_worker, stop_retry_worker, submit_tweets
+from http_client import format_pool_stats
+from metrics import start_metrics_server
+from poll_scheduler import PollScheduler, next_poll_time, record_posts
+
+logger = logging.getLogger(__name__)
+
+
+# 每个 RSSHub 主机一个信号量，限制对同一主机的并发抓取数
+_HOST_SEMAPHORES = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def get_host_semaphore(rss_url):
+    host = urlparse(rss_url).netloc.lower()
+    with _HOST_SEMAPHORES_LOCK:
+        semaphore = _HOST_SEMAPHORES.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(HOST_CONCURRENCY)
+            _HOST_SEMAPHORES[host] = semaphore
+        return semaphore
+
 
 def process_rss_config(config, only_latest=False):
-    """处理单个 RSS 配置
-    only_latest: True=启动时仅获取最新一条且不更新进度
+    """处理单个 RSS 配置: 抓取后把新推文交给翻译/推送流水线
+    only_latest: True=启动时仅获取最新一条
+    返回推送完成的 Future，没有新推文时返回 None
     """
     rss_url = config['url']
     need_translate = config['translate']
+    if _stopping():
+        return None
     
-    mode_msg = "[启动检查]" if only_latest else "[常规检查]"
-    print(f"\n--- {mode_msg} 正在处理 RSS: {rss_url} (翻译: {need_translate}) ---")
+    mode_msg = "启动检查" if only_latest else "常规检查"
+    logger.debug("[%s] 正在处理 RSS (翻译: %s)", mode_msg, need_translate, extra={"feed": rss_url})
     try:
-        new_tweets = fetch_new_tweets(rss_url, only_latest=only_latest)
+        # 仅抓取阶段受主机并发上限约束，翻译和推送不占用名额
+        with get_host_semaphore(rss_url):
+            new_tweets = fetch_new_tweets(rss_url, only_latest=only_latest)
+        record_posts(rss_url, new_tweets)
         
         if not new_tweets:
-            print("没有新推文。")
-            return
+            logger.debug("没有新推文", extra={"feed": rss_url})
+            return None
 
-        print(f"发现 {len(new_tweets)} 条推文，准备处理...")
+        logger.info(
+            "发现 %d 条推文，送入%s推送队列", len(new_tweets), "翻译/" if need_translate else "",
+            extra={"feed": rss_url},
+        )
+        return submit_tweets(rss_url, new_tweets, need_translate)
 
-        for i, tweet in enumerate(new_tweets, 1):
-            print(f"--- 处理第 {i}/{len(new_tweets)} 条 ({tweet['author']}) ---")
-            
-            # 翻译
-            translated_content = ""
-            if need_translate:
-                print("正在翻译...")
-                translated_content = translate_tweet(tweet['content'])
-            else:
-                print("跳过翻译...")
-            
-            # 发送
-            print("正在推送...")
-            send_telegram_message(
-                author=tweet['author'],
-                original_text=tweet['content'], 
-                translated_text=translated_content, 
-                link=tweet['link'],
-                images=tweet.get('images', [])
-            )
-            
-            # 保存进度 (每成功一条就保存一条)
-            save_last_link(rss_url, tweet['link'])
-            
-            # 避免触发 API 限制
-            time.sleep(3)
-            
     except Exception as e:
-        print(f"处理 RSS 出错 [{rss_url}]: {e}")
+        logger.exception("处理 RSS 出错: %s", e, extra={"feed": rss_url})
+    return None
+
+
+def poll_all(only_latest=False):
+    """并发处理所有 RSS 源，耗时约等于最慢的单个源
+    抓取、翻译、推送分阶段并行；同一个源内的推文按顺序推送，保证进度按序保存
+    等待本轮所有推文推送完成后返回
+    """
+    if not RSS_CONFIGS:
+        return
+
+    max_workers = min(FETCH_CONCURRENCY, len(RSS_CONFIGS))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rss") as executor:
+        futures = [
+            executor.submit(process_rss_config, config, only_latest)
+            for config in RSS_CONFIGS
+        ]
+        # process_rss_config 内部已捕获异常，这里拿到的是推送阶段的 Future
+        delivery_futures = [future.result() for future in futures]
+
+    for delivery_future in delivery_futures:
+        if delivery_future is not None:
+            delivery_future.result()
+
+
+def poll_feed(config):
+    """调度器中单个源的定时任务: 抓取并推送，返回下次轮询时间 (推送未完成时返回 Future)"""
+    rss_url = config['url']
+    delivery_future = process_rss_config(config)
+    if delivery_future is None:
+        return next_poll_time(rss_url)
+
+    # 等推送完成后再安排下次轮询，同一个源的抓取不会与上一轮的翻译/推送重叠
+    next_poll = Future()
+    delivery_future.add_done_callback(lambda _: next_poll.set_result(next_poll_time(rss_url)))
+    return next_poll
+
+
+def report_stats():
+    fetch_stats = get_fetch_stats()
+    logger.info(
+        "累计 RSS 请求: 未变化(304) %d 次, 有更新(200) %d 次",
+        fetch_stats['not_modified'], fetch_stats['modified'],
+    )
+    logger.info("HTTP 连接池: %s", format_pool_stats())
+    cache_stats = get_translation_cache_stats()
+    logger.info(
+        "翻译缓存: 命中 %d 次, 未命中 %d 次, 缓存条目 %d",
+        cache_stats['hits'], cache_stats['misses'], cache_stats['entries'],
+    )
+    skip_stats = get_translation_skip_stats()
+    logger.info(
+        "跳过翻译 (省去 AI 调用): 共 %d 条 (中文 %d, 无文字 %d, 过短 %d)",
+        sum(skip_stats.values()), skip_stats.get('chinese', 0), skip_stats.get('empty', 0), skip_stats.get('short', 0),
+    )
+    for (provider, model), stats in get_provider_stats().items():
+        if not stats['count']:
+            continue
+        logger.info(
+            "翻译服务商 %s (%s): 近期请求 %d 次, 错误率 %.0f%%, p50 %s, p95 %s",
+            provider, model, stats['count'], stats['error_rate'] * 100,
+            "-" if stats['p50'] is None else f"{stats['p50']:.1f}s",
+            "-" if stats['p95'] is None else f"{stats['p95']:.1f}s",
+        )
+    outbox_stats = get_outbox_stats()
+    logger.info(
+        "推送发件箱: 待推送推文 %d 条 (目标 %d 个), 已放弃目标 %d 个",
+        outbox_stats['pending_items'], outbox_stats['pending_targets'], outbox_stats['dead_targets'],
+    )
+
+
+def report_stats_task():
+    """调度器中的定时统计任务，每隔 CHECK_INTERVAL 输出一次"""
+    logger.info("运行统计")
+    report_stats()
+    return time.time() + CHECK_INTERVAL
 
 
 def job():
-    print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] 开始本轮检查...")
-    
+    """完整检查一轮所有 RSS 源 (启动时补齐遗漏的历史推文)"""
+    logger.info("开始本轮检查...")
+
     if not RSS_CONFIGS:
-        print("未配置任何 RSS URL。")
+        logger.error("未配置任何 RSS URL")
         return
 
-    for config in RSS_CONFIGS:
-        process_rss_config(config)
-        # 每个 RSS 源处理完后休息一下
-        time.sleep(2)
-        
-    print("\n本轮检查结束。")
+    started = time.time()
+    poll_all()
+
+    logger.info("本轮检查结束。耗时 %.1f 秒", time.time() - started)
+    report_stats()
+
+
+_SCHEDULER = None
+
+
+def _stopping():
+    """是否已收到退出信号: 启动流程和首轮检查据此跳过尚未开始的源"""
+    return _SCHEDULER is not None and _SCHEDULER.stopping
+
 
 def signal_handler(sig, frame):
-    print('\n程序已停止。')
-    sys.exit(0)
+    if _SCHEDULER.stopping:
+        logger.warning("再次收到退出信号，立即退出")
+        os._exit(1)
+
+    logger.info("收到退出信号，等待正在处理的源完成后退出 (再次发送信号可立即退出)...")
+    _SCHEDULER.stop()
 
 if __name__ == "__main__":
+    # 调度器在启动流程之前创建: 启动检查和首轮完整检查期间收到退出信号也能等进行中的源完成后平稳退出
+    executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="rss")
+    _SCHEDULER = PollScheduler(executor)
+
     # 注册退出信号
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    print(f"程序已启动。检查间隔: {CHECK_INTERVAL} 秒")
-    print(f"已配置监控 {len(RSS_CONFIGS)} 个 RSS 源")
-    print(f"已启用通知渠道: {', '.join(ENABLED_CHANNELS) if ENABLED_CHANNELS else '无'}")
+    logger.info("程序已启动。检查间隔: %d 秒", CHECK_INTERVAL)
+    logger.info("已配置监控 %d 个 RSS 源", len(RSS_CONFIGS))
+    logger.info("已启用通知渠道: %s", ', '.join(ENABLED_CHANNELS) if ENABLED_CHANNELS else '无')
     
+    # 后台重试发件箱中未完成的推送 (包括上次退出前遗留的)
+    start_retry_worker()
+
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, METRICS_PORT)
+
     # --- 启动通知流程 ---
-    print("正在发送启动通知...")
+    logger.info("正在发送启动通知...")
     
     # 构建详细的启动消息
     startup_msg_lines = [
         "🤖 Twitter 监控机器人已启动\n",
         f"⏱️ 启动时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
         f"🔄 检查间隔: {CHECK_INTERVAL} 秒",
-        f"🧠 翻译模型: {AI_PROVIDER.upper()}",
+        f"🧠 翻译模型: {', '.join(provider.upper() for provider in AI_PROVIDERS)}",
         f"📢 通知渠道: {', '.join(ENABLED_CHANNELS) if ENABLED_CHANNELS else '无'}"
     ]
     if PROXY_URL:
@@ -110,23 +227,30 @@ if __name__ == "__main__":
         
     send_plain_message("\n".join(startup_msg_lines))
 
-    print("\n[启动检查] 获取所有关注用户的最新推文...")
-    for config in RSS_CONFIGS:
-        # 使用 only_latest=True 模式，仅发送最新一条且不更新进度
-        process_rss_config(config, only_latest=True)
-        time.sleep(2)
-        
-    send_plain_message("✅ 消息获取测试成功，开始进入常规监控循环")
-    print("--- 启动通知流程结束 ---\n")
+    logger.info("[启动检查] 获取所有关注用户的最新推文...")
+    # 使用 only_latest=True 模式，每个源推送最新一条并保存进度；
+    # 旧版 last_link 进度先迁移为已处理集合，新源 Feed 中的其余推文直接记为已处理 (不补发)
+    poll_all(only_latest=True)
+
+    if not _stopping():
+        send_plain_message("✅ 消息获取测试成功，开始进入常规监控循环")
+        logger.info("启动通知流程结束")
     # --------------------
 
     # 立即运行一次常规检查 (补齐遗漏的历史推文)
-    job()
+    if not _stopping():
+        job()
 
-    # 设置定时任务
-    schedule.every(CHECK_INTERVAL).seconds.do(job)
+    # 事件驱动的调度: 每个源按各自的轮询间隔入堆，调度线程睡眠到最早的到期时间
+    # (已收到退出信号时 add 不会入堆，run 立即返回)
+    for config in RSS_CONFIGS:
+        _SCHEDULER.add(config['url'], next_poll_time(config['url']), lambda config=config: poll_feed(config))
+    _SCHEDULER.add("stats", time.time() + CHECK_INTERVAL, report_stats_task)
 
-    while True:
+    _SCHEDULER.run()
 
-        schedule.run_pending()
-        time.sleep(1)
+    # 收到退出信号: 等待进行中的抓取/翻译/推送完成，未完成的推送留在发件箱中，下次启动继续
+    _SCHEDULER.wait_idle()
+    stop_retry_worker()
+    executor.shutdown(wait=True)
+    logger.info("程序已停止")
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from config import CACHE_DB, MEDIA_CACHE_DIR, MEDIA_CACHE_ENABLED, MEDIA_CACHE_MAX_BYTES
+from sqlite_cache import SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+# URL 索引和平台标识各自最多保留的条目数
+MEDIA_INDEX_MAX_ENTRIES = 20000
+
+
+class MediaCache:
+    """按内容寻址的媒体缓存
+
+    - 文件内容按 sha256 存放在磁盘目录中，总大小超过上限时按最近访问时间淘汰 (LRU)
+    - 媒体 URL -> 内容摘要 / Content-Type 的索引保存在 SQLite 中
+    - 各平台上传后返回的标识 (飞书 image_key、Telegram file_id) 也保存在 SQLite 中，
+      重复推送同一张图片时可以跳过下载和上传
+    """
+
+    def __init__(self, directory, max_bytes, index_db):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._urls = SQLiteCache(index_db, "media_urls", max_entries=MEDIA_INDEX_MAX_ENTRIES)
+        self._keys = SQLiteCache(index_db, "media_keys", max_entries=MEDIA_INDEX_MAX_ENTRIES)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _scan(self):
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def get_meta(self, url):
+        """返回 URL 对应的 {"digest", "content_type", "size"}，未缓存时返回 None"""
+        value = self._urls.get(url)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def get_path(self, digest):
+        """返回内容文件路径 (并刷新访问时间)，文件已被淘汰时返回 None"""
+        path = self._path(digest)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store_file(self, url, file_obj, digest, size, content_type):
+        """从文件对象 (当前位置起) 流式复制保存，摘要和大小由调用方在下载时算好
+        返回元数据 {"digest", "content_type", "size"}
+        """
+        path = self._path(digest)
+
+        with self._lock:
+            if not os.path.exists(path):
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".media-")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        shutil.copyfileobj(file_obj, f)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+                    raise
+                self._total_bytes += size
+                self._evict(keep=path)
+
+        meta = {"digest": digest, "content_type": content_type, "size": size}
+        self._urls.set(url, json.dumps(meta))
+        return meta
+
+    def _evict(self, keep=None):
+        if not self.max_bytes or self._total_bytes <= self.max_bytes:
+            return
+        # 按访问时间从旧到新删除，直到回落到上限的 90%
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in sorted(self._scan(), key=lambda item: item[2]):
+            if self._total_bytes <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def get_key(self, kind, key):
+        return self._keys.get(f"{kind}:{key}")
+
+    def set_key(self, kind, key, value):
+        self._keys.set(f"{kind}:{key}", value)
+
+    def delete_key(self, kind, key):
+        self._keys.delete(f"{kind}:{key}")
+
+
+_CACHE = None
+_CACHE_INITIALIZED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_media_cache():
+    """获取全局媒体缓存 (首次调用时初始化)，未启用或初始化失败时返回 None"""
+    global _CACHE, _CACHE_INITIALIZED
+    with _CACHE_LOCK:
+        if not _CACHE_INITIALIZED:
+            _CACHE_INITIALIZED = True
+            if MEDIA_CACHE_ENABLED:
+                try:
+                    _CACHE = MediaCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, CACHE_DB)
+                except Exception as e:
+                    logger.warning("初始化媒体缓存失败，将不使用缓存: %s", e)
+        return _CACHE
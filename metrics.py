@@ -0,0 +1,251 @@
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图的默认分桶 (秒)，覆盖从一次 304 请求到一次推理模型翻译的范围
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        # 指定 collect 时每次输出前调用它获取 {标签值元组: 数值}，用于汇总其他模块已有的统计
+        self._collect = collect
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self):
+        if self._collect is not None:
+            try:
+                values = self._collect()
+            except Exception as e:
+                logger.warning("采集指标 %s 出错: %s", self.name, e)
+                values = {}
+            with self._lock:
+                self._values = {tuple(str(v) for v in key): value for key, value in values.items()}
+
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的数值"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """耗时等数值的分布 (累计分桶 + 总和 + 次数)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            entry["counts"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录 with 代码块的耗时 (秒)，代码块抛出异常时同样记录"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted(
+                (key, list(entry["counts"]), entry["sum"], entry["count"])
+                for key, entry in self._values.items()
+            )
+
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        """按 Prometheus 文本格式输出所有指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=(), collect=None):
+    return REGISTRY.register(Counter(name, documentation, labelnames, collect=collect))
+
+
+def gauge(name, documentation, labelnames=(), collect=None):
+    return REGISTRY.register(Gauge(name, documentation, labelnames, collect=collect))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+
+# --- 各阶段指标 ---
+# feed: RSS URL；target: 推送目标 (telegram / feishu:<receive_id>)；channel: 推送渠道
+
+FETCH_SECONDS = histogram("rss_bot_fetch_seconds", "RSS 请求耗时 (秒)", ["feed"])
+FETCH_TOTAL = counter("rss_bot_fetch_total", "RSS 请求次数 (status: 304 / 200 / error)", ["feed", "status"])
+PARSE_SECONDS = histogram("rss_bot_parse_seconds", "RSS 解析及推文提取耗时 (秒)", ["feed"])
+TWEETS_FETCHED = counter("rss_bot_tweets_fetched_total", "发现的新推文数", ["feed"])
+
+TRANSLATE_SECONDS = histogram("rss_bot_translate_seconds", "每个源一次翻译阶段的耗时 (秒)", ["feed"])
+TRANSLATION_REQUESTS = counter(
+    "rss_bot_translation_requests_total", "翻译 API 请求次数 (result: ok / error)", ["provider", "result"]
+)
+TRANSLATION_RETRIES = counter("rss_bot_translation_retries_total", "翻译失败后的重试次数", ["provider"])
+TRANSLATION_FAILURES = counter("rss_bot_translation_failures_total", "重试后仍失败的翻译数", ["provider"])
+TRANSLATION_HEDGES = counter(
+    "rss_bot_translation_hedges_total", "对冲翻译请求数 (result: won / lost / error)", ["provider", "result"]
+)
+TRANSLATION_SKIPPED = counter(
+    "rss_bot_translation_skipped_total", "无需翻译、跳过 AI 调用的推文数 (reason: empty / chinese / short)", ["reason"]
+)
+TRANSLATION_CACHE = counter("rss_bot_translation_cache_total", "翻译缓存查询次数 (result: hit / miss)", ["result"])
+
+SEND_SECONDS = histogram("rss_bot_send_seconds", "单条推文在一个渠道上的推送耗时 (秒)", ["channel"])
+SEND_TOTAL = counter("rss_bot_send_total", "推送次数 (result: ok / error)", ["target", "result"])
+EDIT_TOTAL = counter("rss_bot_edit_total", "流式翻译时编辑已发送消息的次数 (result: ok / error)", ["channel", "result"])
+RATE_LIMITED = counter("rss_bot_rate_limited_total", "收到 429 后的退避重试次数", ["host"])
+OUTBOX_RETRIES = counter("rss_bot_outbox_retries_total", "发件箱后台重试推送的次数", [])
+TWEETS_DELIVERED = counter("rss_bot_tweets_delivered_total", "推送完成 (进度已保存) 的推文数", ["feed"])
+
+
+_SERVER = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不在标准输出打印每次抓取指标的访问日志
+        pass
+
+
+def start_metrics_server(host, port):
+    """在后台线程启动 /metrics HTTP 服务，端口被占用等失败情况只打印警告"""
+    global _SERVER
+    if _SERVER is not None:
+        return _SERVER
+    try:
+        _SERVER = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error("启动指标服务失败 (%s:%s): %s", host, port, e)
+        return None
+    _SERVER.daemon_threads = True
+    threading.Thread(target=_SERVER.serve_forever, name="metrics", daemon=True).start()
+    logger.info("指标服务已启动: http://%s:%s/metrics", host, _SERVER.server_address[1])
+    return _SERVER
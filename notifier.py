@@ -1,31 +1,122 @@
+import hashlib
 import html
 import json
+import logging
 import mimetypes
+import tempfile
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
-import requests
-
+import http_client
 from config import (
     ENABLED_CHANNELS,
     FEISHU_API_BASE,
     FEISHU_APP_ID,
+    FEISHU_APP_QPS,
     FEISHU_APP_SECRET,
     FEISHU_RECEIVE_IDS,
     FEISHU_RECEIVE_ID_TYPE,
-    PROXY_URL,
+    FEISHU_RECEIVER_QPS,
+    NOTIFY_CONCURRENCY,
+    TG_API_BASE,
     TG_BOT_TOKEN,
     TG_CHAT_ID,
+    TG_CHAT_RATE,
+    TG_GLOBAL_RATE,
+    TG_MEDIA_GROUP_ENABLED,
 )
+from media_cache import get_media_cache
+from metrics import EDIT_TOTAL, RATE_LIMITED, SEND_SECONDS, SEND_TOTAL
+from rate_limiter import KeyedTokenBuckets, TokenBucket
+from text_splitter import split_text
+
+logger = logging.getLogger(__name__)
 
 
 _FEISHU_TOKEN_CACHE = {"token": None, "expire_at": 0}
 
+# 各推送目标的令牌桶限速，遇到 429 时按服务端给出的等待时间暂停
+_TG_GLOBAL_LIMITER = TokenBucket(TG_GLOBAL_RATE, capacity=max(1, int(TG_GLOBAL_RATE)))
+_TG_CHAT_LIMITERS = KeyedTokenBuckets(TG_CHAT_RATE, capacity=max(1, int(TG_CHAT_RATE)))
+_FEISHU_APP_LIMITER = TokenBucket(FEISHU_APP_QPS, capacity=max(1, int(FEISHU_APP_QPS)))
+_FEISHU_RECEIVER_LIMITERS = KeyedTokenBuckets(FEISHU_RECEIVER_QPS, capacity=max(1, int(FEISHU_RECEIVER_QPS)))
+
+RATE_LIMIT_MAX_RETRIES = 3
+
+# Telegram 图片说明长度上限 (官方限制 1024，留出余量) 及相册最多图片数
+TG_CAPTION_LIMIT = 1000
+# Telegram 单条文本消息长度上限 (官方限制 4096，留出余量)
+TG_MESSAGE_LIMIT = 4000
+TG_MEDIA_GROUP_LIMIT = 10
+
+# 图片大小上限 (飞书限制 10MB)，以及下载时保留在内存中的部分大小，超出后写入临时文件
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+IMAGE_SPOOL_MEMORY_SIZE = 1024 * 1024
+
+# 并发推送: 渠道级任务 (Telegram / 飞书整体) 与接收者级任务使用不同线程池，
+# 渠道任务只会等待接收者任务，避免线程池互相等待造成死锁
+_CHANNEL_POOL = ThreadPoolExecutor(max_workers=NOTIFY_CONCURRENCY, thread_name_prefix="notify")
+_RECEIVER_POOL = ThreadPoolExecutor(max_workers=NOTIFY_CONCURRENCY, thread_name_prefix="notify-recv")
+
+
+def _get_retry_after(response):
+    """从 429 响应中读取需要等待的秒数 (Telegram: parameters.retry_after，飞书: x-ogw-ratelimit-reset)"""
+    try:
+        retry_after = (response.json().get("parameters") or {}).get("retry_after")
+        if retry_after:
+            return float(retry_after)
+    except Exception:
+        pass
+
+    for header in ("Retry-After", "x-ogw-ratelimit-reset"):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return max(float(value), 0.5)
+            except ValueError:
+                continue
+    return 1.0
+
+
+def _post_with_rate_limit(limiters, url, method="POST", **kwargs):
+    """经过限速器发送请求 (默认 POST)，收到 429 时暂停限速器并重试"""
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        for limiter in limiters:
+            limiter.acquire()
+
+        # 重试时上传的文件需要从头读取
+        for file_tuple in (kwargs.get("files") or {}).values():
+            file_obj = file_tuple[1] if isinstance(file_tuple, tuple) else file_tuple
+            if hasattr(file_obj, "seek"):
+                file_obj.seek(0)
+
+        response = http_client.request(method, url, **kwargs)
+        if response.status_code != 429 or attempt == RATE_LIMIT_MAX_RETRIES:
+            return response
+
+        retry_after = _get_retry_after(response)
+        RATE_LIMITED.inc(host=urlparse(url).netloc)
+        logger.warning(
+            "触发限流 (429)，%.1f 秒后重试 (%d/%d)", retry_after, attempt + 1, RATE_LIMIT_MAX_RETRIES,
+            extra={"host": urlparse(url).netloc},
+        )
+        for limiter in limiters:
+            limiter.pause(retry_after)
+    return response
+
 
-def get_proxy_dict():
-    if PROXY_URL:
-        return {"http": PROXY_URL, "https": PROXY_URL}
-    return None
+def _post_telegram(url, **kwargs):
+    limiters = [_TG_GLOBAL_LIMITER, _TG_CHAT_LIMITERS.get(TG_CHAT_ID)]
+    return _post_with_rate_limit(limiters, url, **kwargs)
+
+
+def _post_feishu(url, receive_id=None, **kwargs):
+    limiters = [_FEISHU_APP_LIMITER]
+    if receive_id:
+        limiters.append(_FEISHU_RECEIVER_LIMITERS.get(receive_id))
+    return _post_with_rate_limit(limiters, url, **kwargs)
 
 
 def _build_telegram_body(author, original_text, translated_text, link):
@@ -43,77 +134,247 @@ def _build_telegram_body(author, original_text, translated_text, link):
     return "".join(content_parts)
 
 
-def _send_telegram_message(author, original_text, translated_text, link, images=None):
-    if not TG_BOT_TOKEN or not TG_CHAT_ID:
-        print("Telegram 配置缺失，跳过 Telegram 发送。")
-        return
+def _telegram_length(text):
+    # Telegram 按 UTF-16 码元计算长度，emoji 等占 2 个
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _escaped_length(text):
+    return _telegram_length(html.escape(text))
 
+
+def _build_telegram_messages(author, original_text, translated_text, link):
+    """构造推文的 Telegram 文本消息，正文超出单条消息上限时拆成多条 (按顺序)
+
+    原文和译文先在段落 / 句子边界切分再转义，每条消息都是完整的 HTML，不会截断标签或实体；
+    作者只出现在第一条，推文链接只出现在最后一条。
+    """
     body = _build_telegram_body(author, original_text, translated_text, link)
+    if _telegram_length(body) <= TG_MESSAGE_LIMIT:
+        return [body]
+
+    header = f"📢 <b>{html.escape(author)}</b>\n\n"
+    blocks = []
+    for title, text in (("原文", original_text), ("翻译", translated_text)):
+        if not text:
+            continue
+        label = f"<b>{title}：</b>\n"
+        limit = TG_MESSAGE_LIMIT - _telegram_length(header + label)
+        for i, chunk in enumerate(split_text(text, limit, measure=_escaped_length)):
+            blocks.append((label if i == 0 else "") + html.escape(chunk))
+    blocks.append(f"🔗 <a href='{link}'>查看推文</a>")
+    blocks[0] = header + blocks[0]
+
+    # 相邻的块在不超限的前提下合并到同一条消息
+    messages = []
+    current = ""
+    for block in blocks:
+        candidate = f"{current}\n\n{block}" if current else block
+        if current and _telegram_length(candidate) > TG_MESSAGE_LIMIT:
+            messages.append(current)
+            current = block
+        else:
+            current = candidate
+    messages.append(current)
+    return messages
+
+
+def _build_telegram_short_caption(author, link):
+    """正文放不进图片说明时使用的简短说明"""
+    return f"📢 <b>{html.escape(author)}</b>\n\n🔗 <a href='{link}'>查看推文</a>"
+
+
+def _telegram_api_url(method):
+    return f"{TG_API_BASE}/bot{TG_BOT_TOKEN}/{method}"
+
+
+def _remember_telegram_file_ids(cache, image_urls, response):
+    """记录发送成功的图片对应的 file_id (sendPhoto 返回单条消息，sendMediaGroup 返回消息列表)"""
+    try:
+        result = response.json().get("result")
+        messages = result if isinstance(result, list) else [result or {}]
+        for image_url, message in zip(image_urls, messages):
+            photos = message.get("photo") or []
+            if photos:
+                # 同一张图片的多个尺寸，最后一个是最大的
+                cache.set_key("telegram", image_url, photos[-1]["file_id"])
+    except Exception as e:
+        logger.warning("记录 Telegram file_id 失败: %s", e)
+
+
+def _first_message_id(response):
+    result = response.json().get("result")
+    if isinstance(result, list):
+        result = result[0] if result else {}
+    return (result or {}).get("message_id")
+
+
+def _build_telegram_media_request(photos, caption, use_cached_ids):
+    """构造 sendPhoto / sendMediaGroup 请求，返回 (method, payload, 是否使用了缓存的 file_id)"""
+    cache = get_media_cache()
+    used_cache = False
+    sources = []
+    for image_url in photos:
+        file_id = cache.get_key("telegram", image_url) if (cache is not None and use_cached_ids) else None
+        used_cache = used_cache or bool(file_id)
+        sources.append(file_id or image_url)
+
+    if len(photos) == 1:
+        payload = {
+            "chat_id": TG_CHAT_ID,
+            "parse_mode": "HTML",
+            "photo": sources[0],
+            "caption": caption,
+        }
+        return "sendPhoto", payload, used_cache
+
+    # 相册: 说明文字放在第一张图片上
+    media = [{"type": "photo", "media": source} for source in sources]
+    media[0]["caption"] = caption
+    media[0]["parse_mode"] = "HTML"
+    return "sendMediaGroup", {"chat_id": TG_CHAT_ID, "media": media}, used_cache
+
+
+def _send_telegram_media(photos, caption):
+    """发送单图或相册，返回响应；缓存的 file_id 失效时改用原始 URL 重试一次"""
+    method, payload, used_cache = _build_telegram_media_request(photos, caption, use_cached_ids=True)
+    try:
+        response = _post_telegram(_telegram_api_url(method), json=payload, timeout=30)
+        response.raise_for_status()
+    except Exception as e:
+        if not used_cache:
+            raise
+        logger.info("Telegram file_id 不可用，改用图片 URL 重试: %s", e)
+        cache = get_media_cache()
+        for image_url in photos:
+            cache.delete_key("telegram", image_url)
+        method, payload, _ = _build_telegram_media_request(photos, caption, use_cached_ids=False)
+        response = _post_telegram(_telegram_api_url(method), json=payload, timeout=30)
+        response.raise_for_status()
+
+    cache = get_media_cache()
+    if cache is not None:
+        _remember_telegram_file_ids(cache, photos, response)
+    return method, response
 
-    method = "sendMessage"
+
+def _set_telegram_handle(handle, kind, message_ids, texts, reply_to=None):
+    """记录正文所在的消息，供流式翻译编辑
+    kind: caption (正文在图片说明里) / text (正文是一条或多条文本消息组成的回复链)
+    reply_to: 回复链所回复的图片消息
+    """
+    if handle is not None:
+        handle.update(kind=kind, message_ids=list(message_ids), texts=list(texts), reply_to=reply_to)
+
+
+def _send_telegram_text(text, reply_to_message_id=None):
     payload = {
         "chat_id": TG_CHAT_ID,
         "parse_mode": "HTML",
         "disable_web_page_preview": False,
+        "text": text,
     }
+    if reply_to_message_id:
+        payload["reply_to_message_id"] = reply_to_message_id
+    response = _post_telegram(_telegram_api_url("sendMessage"), json=payload, timeout=20)
+    response.raise_for_status()
+    return response
 
-    if images and len(images) > 0:
-        if len(body) <= 1000:
-            method = "sendPhoto"
-            payload["photo"] = images[0]
-            payload["caption"] = body
-            if "disable_web_page_preview" in payload:
-                del payload["disable_web_page_preview"]
-        else:
-            print("内容过长，Telegram 跳过图片发送，改用链接预览。")
-            payload["text"] = body
-    else:
-        payload["text"] = body
 
-    url = f"https://api.telegram.org/bot{TG_BOT_TOKEN}/{method}"
-    proxies = get_proxy_dict()
+def _send_telegram_chain(messages, reply_to_message_id=None):
+    """按顺序发送多条文本消息，每条回复上一条，组成有序的回复链，返回各消息 ID"""
+    message_ids = []
+    for text in messages:
+        response = _send_telegram_text(text, reply_to_message_id=reply_to_message_id)
+        reply_to_message_id = _first_message_id(response)
+        message_ids.append(reply_to_message_id)
+    return message_ids
 
-    try:
-        response = requests.post(url, json=payload, timeout=20, proxies=proxies)
-        response.raise_for_status()
-        print(f"成功推送到 Telegram: {link} (method={method})")
-    except Exception as e:
-        print(f"推送到 Telegram 失败 ({method}): {e}")
 
-        if method == "sendPhoto":
-            print("Telegram 尝试降级为纯文本发送...")
-            try:
-                if "photo" in payload:
-                    del payload["photo"]
-                if "caption" in payload:
-                    del payload["caption"]
+def _send_telegram_message(author, original_text, translated_text, link, images=None, handle=None):
+    """发送推文到 Telegram，成功返回 None，失败返回错误信息
 
-                payload["text"] = body
-                payload["disable_web_page_preview"] = False
+    有图片时: 一张用 sendPhoto，多张用 sendMediaGroup (最多 10 张) 一次发出，
+    正文放在第一张图片的说明里；正文超出说明长度上限时，图片带简短说明，正文作为回复发送。
+    正文超出单条消息上限时拆成多条，按顺序组成回复链。
+    handle 为 dict 时写入正文所在的消息，供之后编辑
+    """
+    if not TG_BOT_TOKEN or not TG_CHAT_ID:
+        logger.warning("Telegram 配置缺失，跳过 Telegram 发送")
+        return "Telegram 配置缺失"
+
+    messages = _build_telegram_messages(author, original_text, translated_text, link)
 
-                url = f"https://api.telegram.org/bot{TG_BOT_TOKEN}/sendMessage"
-                response = requests.post(url, json=payload, timeout=20, proxies=proxies)
-                response.raise_for_status()
-                print(f"Telegram 降级发送成功: {link}")
-            except Exception as e2:
-                print(f"Telegram 降级发送也失败: {e2}")
+    photos = list(images or [])[:TG_MEDIA_GROUP_LIMIT if TG_MEDIA_GROUP_ENABLED else 1]
+    if not photos:
+        try:
+            message_ids = _send_telegram_chain(messages)
+            _set_telegram_handle(handle, "text", message_ids, messages)
+            logger.debug(
+                "成功推送到 Telegram (method=sendMessage, %d 条)", len(messages),
+                extra={"channel": "telegram", "link": link},
+            )
+            return None
+        except Exception as e:
+            logger.warning("推送到 Telegram 失败 (sendMessage): %s", e, extra={"channel": "telegram", "link": link})
+            return str(e)
+
+    overflow = len(messages) > 1 or _telegram_length(messages[0]) > TG_CAPTION_LIMIT
+    caption = _build_telegram_short_caption(author, link) if overflow else messages[0]
+
+    try:
+        method, response = _send_telegram_media(photos, caption)
+        logger.debug("成功推送到 Telegram (method=%s, 图片 %d 张)", method, len(photos), extra={"channel": "telegram", "link": link})
+    except Exception as e:
+        logger.warning(
+            "推送到 Telegram 失败 (图片 %d 张)，尝试降级为纯文本发送: %s", len(photos), e,
+            extra={"channel": "telegram", "link": link},
+        )
+        try:
+            message_ids = _send_telegram_chain(messages)
+            _set_telegram_handle(handle, "text", message_ids, messages)
+            logger.info("Telegram 降级发送成功", extra={"channel": "telegram", "link": link})
+            return None
+        except Exception as e2:
+            logger.warning("Telegram 降级发送也失败: %s", e2, extra={"channel": "telegram", "link": link})
+            return str(e2)
+
+    photo_message_id = _first_message_id(response)
+    if not overflow:
+        _set_telegram_handle(handle, "caption", [photo_message_id], [caption])
+        return None
+
+    # 正文过长: 作为图片消息的回复 (链) 发送
+    try:
+        message_ids = _send_telegram_chain(messages, reply_to_message_id=photo_message_id)
+        _set_telegram_handle(handle, "text", message_ids, messages, reply_to=photo_message_id)
+        logger.debug(
+            "Telegram 正文已作为回复发送 (%d 条)", len(messages),
+            extra={"channel": "telegram", "link": link},
+        )
+        return None
+    except Exception as e:
+        logger.warning("Telegram 正文回复发送失败: %s", e, extra={"channel": "telegram", "link": link})
+        return str(e)
 
 
 def _send_telegram_plain_message(text):
     if not TG_BOT_TOKEN or not TG_CHAT_ID:
-        print("Telegram 配置缺失，跳过 Telegram 发送。")
-        return
+        logger.warning("Telegram 配置缺失，跳过 Telegram 发送")
+        return "Telegram 配置缺失"
 
-    url = f"https://api.telegram.org/bot{TG_BOT_TOKEN}/sendMessage"
-    proxies = get_proxy_dict()
+    url = _telegram_api_url("sendMessage")
     payload = {"chat_id": TG_CHAT_ID, "text": text, "parse_mode": "HTML"}
 
     try:
-        response = requests.post(url, json=payload, timeout=20, proxies=proxies)
+        response = _post_telegram(url, json=payload, timeout=20)
         response.raise_for_status()
-        print(f"系统消息已发送到 Telegram: {text}")
+        logger.info("系统消息已发送到 Telegram", extra={"channel": "telegram"})
+        logger.debug("系统消息内容: %s", text)
+        return None
     except Exception as e:
-        print(f"发送系统消息到 Telegram 失败: {e}")
+        logger.warning("发送系统消息到 Telegram 失败: %s", e, extra={"channel": "telegram"})
+        return str(e)
 
 
 def _get_feishu_tenant_access_token():
@@ -125,7 +386,7 @@ def _get_feishu_tenant_access_token():
     url = f"{FEISHU_API_BASE}/auth/v3/tenant_access_token/internal"
     payload = {"app_id": FEISHU_APP_ID, "app_secret": FEISHU_APP_SECRET}
 
-    response = requests.post(url, json=payload, timeout=20, proxies=get_proxy_dict())
+    response = http_client.post(url, json=payload, timeout=20)
     response.raise_for_status()
     result = response.json()
 
@@ -139,39 +400,101 @@ def _get_feishu_tenant_access_token():
     return token
 
 
-def _download_image_bytes(image_url):
-    response = requests.get(image_url, timeout=20, proxies=get_proxy_dict())
-    response.raise_for_status()
+def _download_image(image_url):
+    """流式下载图片，边下载边计算摘要，超过大小上限立即中止
+    返回 (临时文件, Content-Type, 内容摘要, 大小)，临时文件由调用方关闭
+    """
+    with http_client.stream("GET", image_url, timeout=20) as (response, chunks):
+        response.raise_for_status()
 
-    image_bytes = response.content
-    if not image_bytes:
-        raise RuntimeError("图片内容为空")
+        # 服务端声明的大小已超限时，不读取响应体
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_IMAGE_SIZE:
+            raise RuntimeError("图片超过 10MB 限制")
 
-    max_size = 10 * 1024 * 1024
-    if len(image_bytes) > max_size:
-        raise RuntimeError("图片超过 10MB 限制")
+        content_type = response.headers.get("Content-Type", "")
+        if not content_type:
+            guessed_type, _ = mimetypes.guess_type(image_url)
+            content_type = guessed_type or "application/octet-stream"
 
-    content_type = response.headers.get("Content-Type", "")
-    if not content_type:
-        guessed_type, _ = mimetypes.guess_type(image_url)
-        content_type = guessed_type or "application/octet-stream"
+        # 小图片留在内存中，大图片自动落到临时文件，避免整张图片常驻内存
+        spool = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_MEMORY_SIZE)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MAX_IMAGE_SIZE:
+                    raise RuntimeError("图片超过 10MB 限制")
+                hasher.update(chunk)
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+
+    if size == 0:
+        spool.close()
+        raise RuntimeError("图片内容为空")
 
-    return image_bytes, content_type
+    spool.seek(0)
+    return spool, content_type, hasher.hexdigest(), size
 
 
-def _upload_feishu_image(token, image_url):
-    image_bytes, content_type = _download_image_bytes(image_url)
-    ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".jpg"
-    filename = f"tweet_image{ext}"
+def _open_image(image_url):
+    """打开图片 (优先使用媒体缓存)，返回 (文件对象, Content-Type, 内容摘要)，文件由调用方关闭"""
+    cache = get_media_cache()
+    if cache is not None:
+        meta = cache.get_meta(image_url)
+        path = cache.get_path(meta["digest"]) if meta else None
+        if path:
+            try:
+                return open(path, "rb"), meta["content_type"], meta["digest"]
+            except OSError:
+                pass
 
-    url = f"{FEISHU_API_BASE}/im/v1/images"
-    headers = {"Authorization": f"Bearer {token}"}
-    data = {"image_type": "message"}
-    files = {"image": (filename, image_bytes, content_type)}
+    image_file, content_type, digest, size = _download_image(image_url)
+    if cache is not None:
+        try:
+            cache.store_file(image_url, image_file, digest, size, content_type)
+        except Exception as e:
+            logger.warning("写入媒体缓存失败: %s", e)
+        image_file.seek(0)
+    return image_file, content_type, digest
 
-    response = requests.post(url, headers=headers, data=data, files=files, timeout=30, proxies=get_proxy_dict())
-    response.raise_for_status()
-    result = response.json()
+
+def _upload_feishu_image(token, image_url):
+    # 同一张图片 (按内容摘要) 上传过则直接复用 image_key，跳过下载和上传
+    cache = get_media_cache()
+    if cache is not None:
+        meta = cache.get_meta(image_url)
+        if meta:
+            image_key = cache.get_key("feishu", f"{FEISHU_APP_ID}:{meta['digest']}")
+            if image_key:
+                logger.debug("复用已上传的飞书图片: %s", image_key)
+                return image_key
+
+    image_file, content_type, digest = _open_image(image_url)
+    with image_file:
+        if cache is not None:
+            # 不同 URL 指向相同内容时也能复用
+            image_key = cache.get_key("feishu", f"{FEISHU_APP_ID}:{digest}")
+            if image_key:
+                return image_key
+
+        ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".jpg"
+        filename = f"tweet_image{ext}"
+
+        url = f"{FEISHU_API_BASE}/im/v1/images"
+        headers = {"Authorization": f"Bearer {token}"}
+        data = {"image_type": "message"}
+        # 直接传文件对象，不再额外复制一份图片内容
+        files = {"image": (filename, image_file, content_type)}
+
+        response = _post_feishu(url, headers=headers, data=data, files=files, timeout=30)
+        response.raise_for_status()
+        result = response.json()
 
     if result.get("code") != 0:
         raise RuntimeError(f"飞书图片上传失败: {result.get('msg', 'unknown error')}")
@@ -179,6 +502,12 @@ def _upload_feishu_image(token, image_url):
     image_key = (result.get("data") or {}).get("image_key")
     if not image_key:
         raise RuntimeError("飞书图片上传失败: 未返回 image_key")
+
+    if cache is not None:
+        try:
+            cache.set_key("feishu", f"{FEISHU_APP_ID}:{digest}", image_key)
+        except Exception as e:
+            logger.warning("写入媒体缓存失败: %s", e)
     return image_key
 
 
@@ -225,127 +554,309 @@ def _build_feishu_card(author, original_text, translated_text, link, image_key=N
     }
 
 
-def _send_feishu_card_message(author, original_text, translated_text, link, images=None):
+def _send_feishu_to_receiver(token, receive_id, msg_type, content):
+    url = f"{FEISHU_API_BASE}/im/v1/messages"
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json; charset=utf-8",
+    }
+    payload = {
+        "receive_id": receive_id,
+        "msg_type": msg_type,
+        "content": content,
+        "uuid": str(uuid.uuid4()),
+    }
+    params = {"receive_id_type": FEISHU_RECEIVE_ID_TYPE}
+
+    response = _post_feishu(
+        url,
+        receive_id=receive_id,
+        params=params,
+        headers=headers,
+        json=payload,
+        timeout=20,
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    if result.get("code") != 0:
+        raise RuntimeError(result.get("msg", "unknown error"))
+    return (result.get("data") or {}).get("message_id")
+
+
+def _fan_out_feishu(token, msg_type, content, description, receive_ids=None, handles=None):
+    """并发发送到飞书接收者 (默认全部)，返回 {receive_id: 错误信息或 None}
+    handles 为 dict 时写入发送成功的消息 {receive_id: message_id}
+    """
+    futures = {
+        receive_id: _RECEIVER_POOL.submit(_send_feishu_to_receiver, token, receive_id, msg_type, content)
+        for receive_id in (FEISHU_RECEIVE_IDS if receive_ids is None else receive_ids)
+    }
+
+    results = {}
+    for receive_id, future in futures.items():
+        try:
+            message_id = future.result()
+            results[receive_id] = None
+            if handles is not None and message_id:
+                handles[receive_id] = message_id
+            logger.debug("%s已发送到飞书", description, extra={"channel": "feishu", "target": f"feishu:{receive_id}"})
+        except Exception as e:
+            results[receive_id] = str(e)
+            logger.warning(
+                "%s发送到飞书失败: %s", description, e,
+                extra={"channel": "feishu", "target": f"feishu:{receive_id}"},
+            )
+    return results
+
+
+def _feishu_failure(error, receive_ids=None):
+    receive_ids = FEISHU_RECEIVE_IDS if receive_ids is None else receive_ids
+    return {receive_id: error for receive_id in receive_ids} or {"feishu": error}
+
+
+def _send_feishu_card_message(author, original_text, translated_text, link, images=None, receive_ids=None, handles=None):
+    """发送推文卡片到飞书接收者 (默认全部)，返回 {receive_id: 错误信息或 None}
+    handles 为 dict 时写入发送成功的卡片 {receive_id: {"message_id", "image_key"}}，供之后更新
+    """
     if not FEISHU_APP_ID or not FEISHU_APP_SECRET or not FEISHU_RECEIVE_IDS:
-        print("飞书配置缺失，跳过飞书发送。")
-        return
+        logger.warning("飞书配置缺失，跳过飞书发送")
+        return _feishu_failure("飞书配置缺失", receive_ids)
 
     try:
         token = _get_feishu_tenant_access_token()
     except Exception as e:
-        print(f"获取飞书访问凭证失败: {e}")
-        return
+        logger.error("获取飞书访问凭证失败: %s", e)
+        return _feishu_failure(f"获取飞书访问凭证失败: {e}", receive_ids)
 
     image_key = None
     if images and len(images) > 0:
         try:
             image_key = _upload_feishu_image(token, images[0])
         except Exception as e:
-            print(f"飞书图片处理失败，继续发送无图卡片: {e}")
+            logger.warning("飞书图片处理失败，继续发送无图卡片: %s", e, extra={"channel": "feishu", "link": link})
 
     content = json.dumps(
         _build_feishu_card(author, original_text, translated_text, link, image_key=image_key),
         ensure_ascii=False,
     )
-
-    url = f"{FEISHU_API_BASE}/im/v1/messages"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json; charset=utf-8",
-    }
-
-    for receive_id in FEISHU_RECEIVE_IDS:
-        payload = {
-            "receive_id": receive_id,
-            "msg_type": "interactive",
-            "content": content,
-            "uuid": str(uuid.uuid4()),
-        }
-        params = {"receive_id_type": FEISHU_RECEIVE_ID_TYPE}
-
-        try:
-            response = requests.post(
-                url,
-                params=params,
-                headers=headers,
-                json=payload,
-                timeout=20,
-                proxies=get_proxy_dict(),
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            if result.get("code") != 0:
-                raise RuntimeError(result.get("msg", "unknown error"))
-
-            print(f"成功推送到飞书: {link} (receive_id={receive_id})")
-        except Exception as e:
-            print(f"推送到飞书失败 (receive_id={receive_id}): {e}")
+    message_ids = {} if handles is not None else None
+    results = _fan_out_feishu(token, "interactive", content, f"推文 {link} ", receive_ids, handles=message_ids)
+    for receive_id, message_id in (message_ids or {}).items():
+        handles[receive_id] = {"message_id": message_id, "image_key": image_key}
+    return results
 
 
 def _send_feishu_plain_message(text):
     if not FEISHU_APP_ID or not FEISHU_APP_SECRET or not FEISHU_RECEIVE_IDS:
-        print("飞书配置缺失，跳过飞书发送。")
-        return
+        logger.warning("飞书配置缺失，跳过飞书发送")
+        return _feishu_failure("飞书配置缺失")
 
     try:
         token = _get_feishu_tenant_access_token()
     except Exception as e:
-        print(f"获取飞书访问凭证失败: {e}")
-        return
+        logger.error("获取飞书访问凭证失败: %s", e)
+        return _feishu_failure(f"获取飞书访问凭证失败: {e}")
 
-    url = f"{FEISHU_API_BASE}/im/v1/messages"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json; charset=utf-8",
-    }
     content = json.dumps({"text": text}, ensure_ascii=False)
+    return _fan_out_feishu(token, "text", content, "系统消息")
 
-    for receive_id in FEISHU_RECEIVE_IDS:
-        payload = {
-            "receive_id": receive_id,
-            "msg_type": "text",
-            "content": content,
-            "uuid": str(uuid.uuid4()),
-        }
-        params = {"receive_id_type": FEISHU_RECEIVE_ID_TYPE}
 
-        try:
-            response = requests.post(
-                url,
-                params=params,
-                headers=headers,
-                json=payload,
-                timeout=20,
-                proxies=get_proxy_dict(),
-            )
-            response.raise_for_status()
-            result = response.json()
-            if result.get("code") != 0:
-                raise RuntimeError(result.get("msg", "unknown error"))
+def _collect_channel_results(tasks):
+    """并发执行各渠道的发送任务，汇总为 {目标: 错误信息或 None}
+    目标: "telegram" 或 "feishu:<receive_id>"
+    """
+    def timed(channel, func):
+        with SEND_SECONDS.time(channel=channel):
+            return func()
 
-            print(f"系统消息已发送到飞书 (receive_id={receive_id}): {text}")
+    futures = {channel: _CHANNEL_POOL.submit(timed, channel, func) for channel, func in tasks}
+
+    results = {}
+    for channel, future in futures.items():
+        try:
+            outcome = future.result()
         except Exception as e:
-            print(f"发送系统消息到飞书失败 (receive_id={receive_id}): {e}")
+            logger.exception("推送渠道 %s 出错: %s", channel, e, extra={"channel": channel})
+            outcome = str(e) if channel == "telegram" else _feishu_failure(str(e))
 
+        if channel == "feishu":
+            for receive_id, error in outcome.items():
+                results[f"feishu:{receive_id}"] = error
+        else:
+            results[channel] = outcome
 
-def send_telegram_message(author, original_text, translated_text, link, images=None):
-    """
-    兼容旧函数名：按配置分发到多个通知渠道。
+    for target, error in results.items():
+        SEND_TOTAL.inc(target=target, result="ok" if error is None else "error")
+    return results
+
+
+def get_delivery_targets():
+    """返回当前配置下推文的所有推送目标: "telegram" 或 "feishu:<receive_id>"
     """
+    targets = []
     if "telegram" in ENABLED_CHANNELS:
-        _send_telegram_message(author, original_text, translated_text, link, images=images)
-
+        targets.append("telegram")
     if "feishu" in ENABLED_CHANNELS:
-        _send_feishu_card_message(author, original_text, translated_text, link, images=images)
+        targets.extend(f"feishu:{receive_id}" for receive_id in FEISHU_RECEIVE_IDS)
+    return targets
+
+
+def send_telegram_message(author, original_text, translated_text, link, images=None, targets=None, handles=None):
+    """
+    兼容旧函数名：按配置并发分发到多个通知渠道。
+    targets 为推送目标列表时只发送到这些目标 (用于发件箱重试)，默认发送到全部目标。
+    handles 为 dict 时写入发送成功的各目标消息标识 {目标: ...}，供 edit_tweet_message 编辑。
+    返回每个推送目标的结果 {目标: 错误信息或 None}
+    """
+    receive_ids = None
+    if targets is not None:
+        receive_ids = [target[len("feishu:"):] for target in targets if target.startswith("feishu:")]
+
+    telegram_handle = {} if handles is not None else None
+    feishu_handles = {} if handles is not None else None
+
+    tasks = []
+    if "telegram" in ENABLED_CHANNELS and (targets is None or "telegram" in targets):
+        tasks.append(("telegram", lambda: _send_telegram_message(
+            author, original_text, translated_text, link, images=images, handle=telegram_handle
+        )))
+
+    if "feishu" in ENABLED_CHANNELS and (receive_ids is None or receive_ids):
+        tasks.append(("feishu", lambda: _send_feishu_card_message(
+            author, original_text, translated_text, link, images=images, receive_ids=receive_ids,
+            handles=feishu_handles,
+        )))
+
+    results = _collect_channel_results(tasks)
+    if handles is not None:
+        if results.get("telegram", "") is None and telegram_handle.get("message_ids"):
+            handles["telegram"] = telegram_handle
+        for receive_id, handle in feishu_handles.items():
+            handles[f"feishu:{receive_id}"] = handle
+    return results
+
+
+def _is_not_modified(response):
+    # 编辑后的内容与当前内容相同时 Telegram 返回 400，视为成功
+    return response.status_code == 400 and "message is not modified" in response.text
+
+
+def _telegram_edit(method, payload):
+    payload = {"chat_id": TG_CHAT_ID, "parse_mode": "HTML", **payload}
+    response = _post_telegram(_telegram_api_url(method), json=payload, timeout=20)
+    if not _is_not_modified(response):
+        response.raise_for_status()
+
+
+def _edit_telegram_message(handle, author, original_text, translated_text, link):
+    """按新内容编辑正文所在的消息，内容没变的消息不重复编辑"""
+    messages = _build_telegram_messages(author, original_text, translated_text, link)
+
+    if handle["kind"] == "caption":
+        photo_message_id = handle["message_ids"][0]
+        if len(messages) == 1 and _telegram_length(messages[0]) <= TG_CAPTION_LIMIT:
+            if messages[0] != handle["texts"][0]:
+                _telegram_edit("editMessageCaption", {"message_id": photo_message_id, "caption": messages[0]})
+                handle["texts"] = messages
+            return
+
+        # 译文变长后图片说明放不下: 说明改为简短说明，正文作为回复链发送，之后改为编辑回复链
+        _telegram_edit(
+            "editMessageCaption",
+            {"message_id": photo_message_id, "caption": _build_telegram_short_caption(author, link)},
+        )
+        message_ids = _send_telegram_chain(messages, reply_to_message_id=photo_message_id)
+        _set_telegram_handle(handle, "text", message_ids, messages, reply_to=photo_message_id)
+        return
+
+    message_ids = handle["message_ids"]
+    texts = handle["texts"]
+    for i, text in enumerate(messages):
+        if i < len(message_ids):
+            if text != texts[i]:
+                _telegram_edit(
+                    "editMessageText",
+                    {"message_id": message_ids[i], "text": text, "disable_web_page_preview": False},
+                )
+                texts[i] = text
+            continue
+        # 译文变长需要更多条消息: 接在回复链末尾
+        response = _send_telegram_text(text, reply_to_message_id=message_ids[-1] if message_ids else handle["reply_to"])
+        message_ids.append(_first_message_id(response))
+        texts.append(text)
+
+    # 内容变短后多出的消息删除
+    for message_id in message_ids[len(messages):]:
+        response = _post_telegram(
+            _telegram_api_url("deleteMessage"), json={"chat_id": TG_CHAT_ID, "message_id": message_id}, timeout=20
+        )
+        response.raise_for_status()
+    del message_ids[len(messages):]
+    del texts[len(messages):]
+
+
+def _edit_feishu_card(receive_id, handle, author, original_text, translated_text, link):
+    # 卡片开启了 update_multi，更新后所有接收者看到的都是新内容
+    token = _get_feishu_tenant_access_token()
+    card = _build_feishu_card(author, original_text, translated_text, link, image_key=handle.get("image_key"))
+    response = _post_feishu(
+        f"{FEISHU_API_BASE}/im/v1/messages/{handle['message_id']}",
+        receive_id=receive_id,
+        method="PATCH",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json; charset=utf-8",
+        },
+        json={"content": json.dumps(card, ensure_ascii=False)},
+        timeout=20,
+    )
+    response.raise_for_status()
+    result = response.json()
+    if result.get("code") != 0:
+        raise RuntimeError(result.get("msg", "unknown error"))
+
+
+def edit_tweet_message(handles, author, original_text, translated_text, link):
+    """用新的译文并发编辑 send_telegram_message 已发送的消息
+    handles: send_telegram_message 写入的 {目标: 消息标识}，Telegram 正文改为回复发送时会原地更新
+    返回每个目标的结果 {目标: 错误信息或 None}
+    """
+    futures = {}
+    for target, handle in handles.items():
+        if target == "telegram":
+            futures[target] = _RECEIVER_POOL.submit(
+                _edit_telegram_message, handle, author, original_text, translated_text, link
+            )
+        elif target.startswith("feishu:"):
+            futures[target] = _RECEIVER_POOL.submit(
+                _edit_feishu_card, target[len("feishu:"):], handle, author, original_text, translated_text, link
+            )
+
+    results = {}
+    for target, future in futures.items():
+        channel = target.split(":", 1)[0]
+        try:
+            future.result()
+            results[target] = None
+            EDIT_TOTAL.inc(channel=channel, result="ok")
+        except Exception as e:
+            results[target] = str(e)
+            EDIT_TOTAL.inc(channel=channel, result="error")
+            logger.warning("编辑已发送的消息失败: %s", e, extra={"target": target, "link": link})
+    return results
 
 
 def send_plain_message(text):
     """
-    兼容旧函数名：按配置分发到多个通知渠道。
+    兼容旧函数名：按配置并发分发到多个通知渠道。
+    返回每个推送目标的结果 {目标: 错误信息或 None}
     """
+    tasks = []
     if "telegram" in ENABLED_CHANNELS:
-        _send_telegram_plain_message(text)
+        tasks.append(("telegram", lambda: _send_telegram_plain_message(text)))
 
     if "feishu" in ENABLED_CHANNELS:
-        _send_feishu_plain_message(text)
+        tasks.append(("feishu", lambda: _send_feishu_plain_message(text)))
+
+    return _collect_channel_results(tasks)
@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+
+from config import OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX, OUTBOX_DB, OUTBOX_MAX_ATTEMPTS
+from state_store import connect_sqlite
+
+
+class Outbox:
+    """持久化推送发件箱 (SQLite)
+
+    翻译完成的推文先写入发件箱，每个推送目标 (telegram / feishu:<receive_id>) 单独记录状态。
+    所有目标都推送成功 (或达到最大重试次数) 后才算完成，进程崩溃或推送失败后可以重试，
+    保证至少推送一次。
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "rss_url TEXT NOT NULL, "
+                "entry_id TEXT NOT NULL, "
+                "tweet TEXT NOT NULL, "
+                "translated TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "UNIQUE (rss_url, entry_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox_delivery ("
+                "outbox_id INTEGER NOT NULL, "
+                "target TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, "
+                "last_error TEXT, "
+                "PRIMARY KEY (outbox_id, target))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_delivery_due "
+                "ON outbox_delivery (status, next_attempt_at)"
+            )
+
+    def contains(self, rss_url, entry_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE rss_url = ? AND entry_id = ?", (rss_url, entry_id)
+            ).fetchone()
+            return row is not None
+
+    def enqueue(self, rss_url, tweet, translated, targets):
+        """写入一条待推送的推文，已存在时返回 None，否则返回发件箱 ID
+
+        新写入的目标由调用方立即推送，OUTBOX_BACKOFF_BASE 秒后才对重试线程到期，
+        重试线程只会拿到推送失败或进程退出前未完成的目标
+        """
+        entry_id = tweet.get('id') or tweet['link']
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox (rss_url, entry_id, tweet, translated, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (rss_url, entry_id, json.dumps(tweet, ensure_ascii=False), translated or "", now),
+                )
+                if cursor.rowcount == 0:
+                    return None
+                outbox_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO outbox_delivery (outbox_id, target, next_attempt_at) VALUES (?, ?, ?)",
+                    [(outbox_id, target, now + OUTBOX_BACKOFF_BASE) for target in targets],
+                )
+            return outbox_id
+
+    def pending_targets(self, outbox_id):
+        """该推文仍待推送的目标 (推文已推送完成并移出发件箱时为空)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target FROM outbox_delivery WHERE outbox_id = ? AND status = 'pending'",
+                (outbox_id,),
+            ).fetchall()
+            return [target for (target,) in rows]
+
+    def abandon(self, outbox_id, targets, reason):
+        """直接放弃这些目标 (标记为 dead)，例如推送渠道已从配置中移除"""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE outbox_delivery SET status = 'dead', last_error = ? "
+                    "WHERE outbox_id = ? AND target = ?",
+                    [(reason, outbox_id, target) for target in targets],
+                )
+
+    def record_results(self, outbox_id, results):
+        """记录一次推送结果 {目标: 错误信息或 None}
+
+        失败的目标按指数退避安排下次重试，超过最大次数的标记为 dead。
+        返回 True 表示该推文已没有待推送的目标。
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                for target, error in results.items():
+                    if error is None:
+                        self._conn.execute(
+                            "UPDATE outbox_delivery SET status = 'done', last_error = NULL "
+                            "WHERE outbox_id = ? AND target = ?",
+                            (outbox_id, target),
+                        )
+                        continue
+
+                    row = self._conn.execute(
+                        "SELECT attempts FROM outbox_delivery WHERE outbox_id = ? AND target = ?",
+                        (outbox_id, target),
+                    ).fetchone()
+                    attempts = (row[0] if row else 0) + 1
+                    status = "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+                    delay = min(OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX)
+                    self._conn.execute(
+                        "UPDATE outbox_delivery SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                        "WHERE outbox_id = ? AND target = ?",
+                        (status, attempts, now + delay, str(error)[:500], outbox_id, target),
+                    )
+
+            (pending,) = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox_delivery WHERE outbox_id = ? AND status = 'pending'",
+                (outbox_id,),
+            ).fetchone()
+            return pending == 0
+
+    def set_translation(self, outbox_id, translated):
+        """更新尚未推送完成的推文的译文 (流式翻译先推送原文，之后的重试使用完整译文)"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("UPDATE outbox SET translated = ? WHERE id = ?", (translated or "", outbox_id))
+
+    def remove(self, outbox_id):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM outbox_delivery WHERE outbox_id = ?", (outbox_id,))
+                self._conn.execute("DELETE FROM outbox WHERE id = ?", (outbox_id,))
+
+    def due_items(self, limit=50):
+        """返回到期需要重试的推文 [(outbox_id, rss_url, tweet, translated, [目标...])]"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT o.id, o.rss_url, o.tweet, o.translated, d.target "
+                "FROM outbox_delivery d JOIN outbox o ON o.id = d.outbox_id "
+                "WHERE d.status = 'pending' AND d.next_attempt_at <= ? "
+                "ORDER BY o.id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+
+        items = {}
+        for outbox_id, rss_url, tweet, translated, target in rows:
+            if outbox_id not in items:
+                items[outbox_id] = (outbox_id, rss_url, json.loads(tweet), translated, [])
+            items[outbox_id][4].append(target)
+        return list(items.values())
+
+    def depth(self):
+        """发件箱积压情况: 待推送的推文数、待推送的目标数、已放弃的目标数"""
+        with self._lock:
+            (pending_items,) = self._conn.execute(
+                "SELECT COUNT(DISTINCT outbox_id) FROM outbox_delivery WHERE status = 'pending'"
+            ).fetchone()
+            (pending_targets,) = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox_delivery WHERE status = 'pending'"
+            ).fetchone()
+            (dead_targets,) = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox_delivery WHERE status = 'dead'"
+            ).fetchone()
+        return {
+            "pending_items": pending_items,
+            "pending_targets": pending_targets,
+            "dead_targets": dead_targets,
+        }
+
+
+_OUTBOX = None
+_OUTBOX_LOCK = threading.Lock()
+
+
+def get_outbox():
+    """获取全局发件箱 (首次调用时初始化)"""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            _OUTBOX = Outbox(OUTBOX_DB)
+        return _OUTBOX
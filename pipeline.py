@@ -0,0 +1,294 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config import (
+    DELIVER_WORKERS,
+    OUTBOX_RETRY_INTERVAL,
+    STREAM_EDIT_INTERVAL,
+    STREAMING_TRANSLATION,
+    TRANSLATE_WORKERS,
+)
+from metrics import OUTBOX_RETRIES, TRANSLATE_SECONDS, TWEETS_DELIVERED, gauge
+from notifier import edit_tweet_message, get_delivery_targets, send_telegram_message
+from outbox import get_outbox
+from rss_fetcher import get_entry_id, save_last_link
+from translator import needs_translation, stream_translate_tweet, translate_tweet, translate_tweets
+
+logger = logging.getLogger(__name__)
+
+
+# 抓取 -> 翻译队列 -> 推送队列
+# 翻译和推送各有独立线程池，抓取线程提交后立即返回去处理下一个源，
+# 一个源的翻译等待不会阻塞其他源的抓取和推送
+_TRANSLATE_POOL = ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS, thread_name_prefix="translate")
+_DELIVER_POOL = ThreadPoolExecutor(max_workers=DELIVER_WORKERS, thread_name_prefix="deliver")
+
+# 正在推送的发件箱条目，避免流水线和后台重试线程同时推送同一条
+_IN_FLIGHT = set()
+_IN_FLIGHT_LOCK = threading.Lock()
+
+_RETRY_STOP = threading.Event()
+_RETRY_THREAD = None
+
+# 流式翻译: 先推送原文时译文处的占位提示，以及翻译进行中附在译文末尾的光标
+STREAM_PLACEHOLDER = "⏳ 翻译中..."
+STREAM_CURSOR = " ▌"
+
+
+def _translate(rss_url, tweets):
+    with TRANSLATE_SECONDS.time(feed=rss_url):
+        # 多条推文时打包批量翻译，省去逐条请求的往返延迟
+        if len(tweets) > 1:
+            logger.debug("正在批量翻译 %d 条推文", len(tweets), extra={"feed": rss_url})
+            return translate_tweets([tweet['content'] for tweet in tweets])
+        logger.debug("正在翻译", extra={"feed": rss_url, "link": tweets[0]['link']})
+        return [translate_tweet(tweets[0]['content'])]
+
+
+def _deliver_item(outbox_id, rss_url, tweet, translated, targets, handles=None):
+    """推送发件箱中的一条推文到指定目标，所有目标完成后才保存进度
+    handles 为 dict 时写入发送成功的各目标消息标识 (用于流式翻译编辑消息)
+    返回 True 表示该推文已推送完成 (或失败目标已放弃重试)
+    """
+    with _IN_FLIGHT_LOCK:
+        if outbox_id in _IN_FLIGHT:
+            return False
+        _IN_FLIGHT.add(outbox_id)
+
+    try:
+        outbox = get_outbox()
+        # 调用方的目标列表可能来自过期的快照 (如重试线程读取后流水线已推送完成)，
+        # 持有 _IN_FLIGHT 后重新读取仍待推送的目标，已没有时不再发送
+        pending = set(outbox.pending_targets(outbox_id))
+        targets = [target for target in targets if target in pending]
+        if not targets:
+            return False
+
+        # 渠道或飞书接收者已从配置中移除 (重启前写入的目标) 时直接放弃，不再无限重试
+        configured = set(get_delivery_targets())
+        removed = [target for target in targets if target not in configured]
+        if removed:
+            logger.warning(
+                "推送目标已不在当前配置中，放弃: %s", ", ".join(removed),
+                extra={"feed": rss_url, "link": tweet['link']},
+            )
+            outbox.abandon(outbox_id, removed, "推送目标已不在当前配置中")
+            targets = [target for target in targets if target in configured]
+
+        results = {}
+        if targets:
+            results = send_telegram_message(
+                author=tweet['author'],
+                original_text=tweet['content'],
+                translated_text=translated,
+                link=tweet['link'],
+                images=tweet.get('images', []),
+                targets=targets,
+                handles=handles,
+            )
+        # 没有返回结果的目标按一次失败计，避免一直停留在待推送状态
+        for target in targets:
+            results.setdefault(target, "未发送 (渠道未启用)")
+        finished = outbox.record_results(outbox_id, results)
+        if not finished:
+            failed = [target for target, error in results.items() if error is not None]
+            logger.warning(
+                "推送失败的目标: %s，将在后台重试", ", ".join(failed),
+                extra={"feed": rss_url, "link": tweet['link']},
+            )
+            return False
+
+        # 所有目标都已推送 (推送频率由 notifier 中各渠道的令牌桶控制)，此时才推进进度
+        save_last_link(rss_url, tweet['link'], entry_id=tweet.get('id'))
+        outbox.remove(outbox_id)
+        TWEETS_DELIVERED.inc(feed=rss_url)
+        logger.info("推文推送完成 (%s)", tweet['author'], extra={"feed": rss_url, "link": tweet['link']})
+        return True
+    finally:
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.discard(outbox_id)
+
+
+def _deliver(rss_url, tweets, translations):
+    """按顺序把同一个源的推文写入发件箱并推送"""
+    outbox = get_outbox()
+    targets = get_delivery_targets()
+    for i, tweet in enumerate(tweets, 1):
+        logger.debug(
+            "推送第 %d/%d 条 (%s)", i, len(tweets), tweet['author'],
+            extra={"feed": rss_url, "link": tweet['link']},
+        )
+        translated = translations[i - 1] if translations else ""
+        outbox_id = outbox.enqueue(rss_url, tweet, translated, targets)
+        if outbox_id is None:
+            logger.debug("推文已在发件箱中，跳过", extra={"feed": rss_url, "link": tweet['link']})
+            continue
+        _deliver_item(outbox_id, rss_url, tweet, translated, targets)
+
+
+def _stream_translation(rss_url, outbox_id, tweet, handles, sent_text):
+    """流式翻译一条已推送原文的推文，边翻译边编辑已发送的消息 (两次编辑至少间隔 STREAM_EDIT_INTERVAL 秒)
+    编辑失败只记录日志；译文同时写回发件箱，之后重试推送的目标直接使用完整译文
+    """
+    last_edit_at = time.monotonic()
+    last_text = sent_text
+
+    def edit(text):
+        nonlocal last_edit_at, last_text
+        if not handles or text == last_text:
+            return
+        last_edit_at = time.monotonic()
+        last_text = text
+        edit_tweet_message(handles, tweet['author'], tweet['content'], text, tweet['link'])
+
+    def on_update(partial):
+        if time.monotonic() - last_edit_at >= STREAM_EDIT_INTERVAL:
+            edit(partial + STREAM_CURSOR)
+
+    logger.debug("正在流式翻译", extra={"feed": rss_url, "link": tweet['link']})
+    with TRANSLATE_SECONDS.time(feed=rss_url):
+        translated = stream_translate_tweet(tweet['content'], on_update)
+    get_outbox().set_translation(outbox_id, translated)
+    edit(translated)
+
+
+def _deliver_streaming(rss_url, tweets, futures):
+    """流式翻译模式: 按顺序把推文写入发件箱并立即推送原文，再为每条推文提交流式翻译任务
+    翻译任务的 Future 追加到 futures 中
+    """
+    outbox = get_outbox()
+    targets = get_delivery_targets()
+    for i, tweet in enumerate(tweets, 1):
+        logger.debug(
+            "推送第 %d/%d 条原文 (%s)", i, len(tweets), tweet['author'],
+            extra={"feed": rss_url, "link": tweet['link']},
+        )
+        outbox_id = outbox.enqueue(rss_url, tweet, "", targets)
+        if outbox_id is None:
+            logger.debug("推文已在发件箱中，跳过", extra={"feed": rss_url, "link": tweet['link']})
+            continue
+        handles = {}
+        # 无需翻译的推文 (已是中文、纯链接等) 不显示占位提示
+        placeholder = STREAM_PLACEHOLDER if needs_translation(tweet['content']) else ""
+        _deliver_item(outbox_id, rss_url, tweet, placeholder, targets, handles=handles)
+        # 即使全部目标都推送失败也要翻译，后台重试时推送完整译文
+        futures.append(_TRANSLATE_POOL.submit(_stream_translation, rss_url, outbox_id, tweet, handles, placeholder))
+
+
+def _set_result_when_done(futures, done):
+    """futures 全部完成后结束 done (不占用线程等待)"""
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(future):
+        try:
+            future.result()
+        except Exception as e:
+            logger.exception("流式翻译出错: %s", e)
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        done.set_result(None)
+
+    if not futures:
+        done.set_result(None)
+    for future in futures:
+        future.add_done_callback(on_done)
+
+
+def retry_pending_deliveries():
+    """推送发件箱中到期的失败目标 (包括上次进程退出前未完成的推文)"""
+    for outbox_id, rss_url, tweet, translated, targets in get_outbox().due_items():
+        if _RETRY_STOP.is_set():
+            break
+        logger.info("重试推送 -> %s", ", ".join(targets), extra={"feed": rss_url, "link": tweet['link']})
+        OUTBOX_RETRIES.inc()
+        try:
+            _deliver_item(outbox_id, rss_url, tweet, translated, targets)
+        except Exception as e:
+            logger.exception("重试推送出错: %s", e, extra={"feed": rss_url, "link": tweet['link']})
+
+
+def _retry_loop():
+    while not _RETRY_STOP.wait(OUTBOX_RETRY_INTERVAL):
+        try:
+            retry_pending_deliveries()
+        except Exception as e:
+            logger.exception("发件箱重试线程出错: %s", e)
+
+
+def start_retry_worker():
+    """启动后台发件箱重试线程 (重复调用无效)"""
+    global _RETRY_THREAD
+    if _RETRY_THREAD is None:
+        _RETRY_THREAD = threading.Thread(target=_retry_loop, name="outbox-retry", daemon=True)
+        _RETRY_THREAD.start()
+
+
+def stop_retry_worker():
+    _RETRY_STOP.set()
+
+
+def get_outbox_stats():
+    """发件箱积压情况: {"pending_items", "pending_targets", "dead_targets"}"""
+    return get_outbox().depth()
+
+
+gauge(
+    "rss_bot_outbox_depth", "发件箱积压 (kind: pending_items / pending_targets / dead_targets)", ["kind"],
+    collect=lambda: {(kind,): value for kind, value in get_outbox_stats().items()},
+)
+
+
+def submit_tweets(rss_url, tweets, need_translate):
+    """把一个源的新推文 (旧 -> 新) 送入流水线
+
+    返回一个 Future，在该源的推文全部推送完成后结束。
+    同一个源的推文在一个推送任务内按顺序处理；推送失败的推文留在发件箱中由后台线程重试，
+    全部目标推送成功后才保存进度。
+    """
+    done = Future()
+
+    # 已在发件箱中的推文由重试线程负责，不再重复翻译和推送
+    outbox = get_outbox()
+    tweets = [tweet for tweet in tweets if not outbox.contains(rss_url, get_entry_id(tweet))]
+    if not tweets:
+        done.set_result(None)
+        return done
+
+    def deliver_streaming():
+        futures = []
+        try:
+            _deliver_streaming(rss_url, tweets, futures)
+        except Exception as e:
+            logger.exception("推送 RSS 推文出错: %s", e, extra={"feed": rss_url})
+        finally:
+            _set_result_when_done(futures, done)
+
+    def deliver(translations):
+        try:
+            _deliver(rss_url, tweets, translations)
+        except Exception as e:
+            logger.exception("推送 RSS 推文出错: %s", e, extra={"feed": rss_url})
+        finally:
+            done.set_result(None)
+
+    def on_translated(future):
+        try:
+            translations = future.result()
+        except Exception as e:
+            logger.error("翻译出错: %s", e, extra={"feed": rss_url})
+            translations = [f"翻译失败: {e}"] * len(tweets)
+        _DELIVER_POOL.submit(deliver, translations)
+
+    if need_translate and STREAMING_TRANSLATION:
+        # 先推送原文，翻译完成后编辑消息，首条通知不必等待翻译
+        _DELIVER_POOL.submit(deliver_streaming)
+    elif need_translate:
+        _TRANSLATE_POOL.submit(_translate, rss_url, tweets).add_done_callback(on_translated)
+    else:
+        _DELIVER_POOL.submit(deliver, None)
+    return done
@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from config import (
+    ADAPTIVE_POLLING,
+    CHECK_INTERVAL,
+    POLL_ADAPT_FACTOR,
+    POLL_HISTORY_SIZE,
+    POLL_JITTER,
+    POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL,
+)
+from state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+def _parse_published(text):
+    """解析推文发布时间 (RSS 2.0 的 RFC 822 或 Atom 的 ISO 8601)，失败时返回 None"""
+    if not text:
+        return None
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def record_posts(rss_url, tweets, now=None):
+    """把新推文的发布时间记入该源的发帖历史 (状态存储中的 post_times 字段)"""
+    if not tweets:
+        return
+    now = time.time() if now is None else now
+
+    # 没有发布时间的推文按发现时间计
+    new_times = [_parse_published(tweet.get('published')) or now for tweet in tweets]
+    store = get_state_store()
+    post_times = set(store.get(rss_url).get("post_times", []))
+    post_times.update(min(t, now) for t in new_times)
+    store.update(rss_url, post_times=sorted(post_times)[-POLL_HISTORY_SIZE:])
+
+
+def estimate_post_gap(post_times, now):
+    """根据发帖历史估计发帖间隔 (秒)，历史不足两条时返回 None
+
+    取最近几条推文的平均间隔；如果距最后一条推文已经超过这个间隔，说明账号变冷了，
+    改用沉寂时长作为估计值，沉寂越久轮询越慢。
+    """
+    if len(post_times) < 2:
+        return None
+    average_gap = (post_times[-1] - post_times[0]) / (len(post_times) - 1)
+    return max(average_gap, now - post_times[-1])
+
+
+def next_poll_interval(rss_url, now=None):
+    """计算该源距下次轮询的间隔 (秒)，已包含随机抖动"""
+    if not ADAPTIVE_POLLING:
+        return CHECK_INTERVAL
+
+    now = time.time() if now is None else now
+    gap = estimate_post_gap(get_state_store().get(rss_url).get("post_times", []), now)
+    interval = CHECK_INTERVAL if gap is None else gap * POLL_ADAPT_FACTOR
+    interval = min(max(interval, POLL_MIN_INTERVAL), POLL_MAX_INTERVAL)
+    return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+
+def next_poll_time(rss_url, now=None):
+    """一次轮询结束后计算该源下次轮询的时间戳"""
+    now = time.time() if now is None else now
+    return now + next_poll_interval(rss_url, now)
+
+
+class PollScheduler:
+    """基于最小堆的定时调度器
+
+    每个任务 (以 key 区分) 在堆中只有一个下次执行时间，调度线程睡眠到最早的到期时间，
+    把到期任务交给线程池执行。任务执行完 (返回的 Future 也完成) 后才按返回的时间重新入堆，
+    因此同一个任务不会重叠执行。
+
+    任务函数返回下次执行的时间戳、结果为时间戳的 Future，或 None 表示不再执行。
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._scheduled = set()
+        self._running = set()
+        self._stopping = False
+
+    def add(self, key, due_at, task):
+        """安排任务在 due_at 执行，已在堆中或正在执行的任务不会重复添加"""
+        with self._cond:
+            if self._stopping or key in self._scheduled or key in self._running:
+                return False
+            self._push(key, due_at, task)
+            return True
+
+    def _push(self, key, due_at, task):
+        heapq.heappush(self._heap, (due_at, next(self._seq), key, task))
+        self._scheduled.add(key)
+        self._cond.notify_all()
+
+    def run(self):
+        """在当前线程运行调度循环，直到 stop() 被调用"""
+        with self._cond:
+            while not self._stopping:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                _, _, key, task = heapq.heappop(self._heap)
+                self._scheduled.discard(key)
+                self._running.add(key)
+                self._executor.submit(self._run_task, key, task)
+
+    def _run_task(self, key, task):
+        try:
+            result = task()
+        except Exception as e:
+            logger.exception("定时任务 %s 出错: %s", key, e)
+            result = time.time() + CHECK_INTERVAL
+
+        if isinstance(result, Future):
+            result.add_done_callback(lambda future: self._finish(key, task, future))
+        else:
+            self._finish(key, task, result)
+
+    def _finish(self, key, task, result):
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except Exception as e:
+                logger.exception("定时任务 %s 出错: %s", key, e)
+                result = time.time() + CHECK_INTERVAL
+
+        with self._cond:
+            self._running.discard(key)
+            if result is not None and not self._stopping:
+                self._push(key, result, task)
+            self._cond.notify_all()
+
+    @property
+    def stopping(self):
+        return self._stopping
+
+    def stop(self):
+        """停止调度新任务 (正在执行的任务不受影响)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """等待正在执行的任务全部结束，超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._running:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
@@ -0,0 +1,181 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# 至少有这么多样本后才使用统计出的延迟和错误率
+MIN_SAMPLES = 5
+# 滚动窗口内错误率达到该值的服务商排到最后，只在其他服务商都失败时使用
+UNHEALTHY_ERROR_RATE = 0.5
+
+
+class ProvidersFailedError(RuntimeError):
+    """本次调用尝试过的服务商全部失败，provider 为最后一个失败的服务商名"""
+
+    def __init__(self, message, provider=None):
+        super().__init__(message)
+        self.provider = provider
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+class ProviderStats:
+    """单个 (服务商, 模型) 在滚动时间窗口内的请求延迟和成败"""
+
+    def __init__(self, window, max_samples=200):
+        self.window = window
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self):
+        """返回 {"count", "error_rate", "p50", "p95"}，延迟只统计成功的请求，样本不足时为 None"""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            samples = list(self._samples)
+
+        latencies = [latency for _, latency, ok in samples if ok]
+        errors = len(samples) - len(latencies)
+        enough = len(latencies) >= MIN_SAMPLES
+        return {
+            "count": len(samples),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "p50": _percentile(latencies, 50) if enough else None,
+            "p95": _percentile(latencies, 95) if enough else None,
+        }
+
+
+class ProviderRouter:
+    """在多个翻译服务商 / 模型之间路由请求
+
+    - 按滚动窗口内的错误率和中位延迟给服务商排序，错误率过高的排到最后；
+      没有样本的服务商排在前面，窗口过期后会被重新尝试
+    - 对冲请求: 首选服务商超过其 p95 延迟仍未返回时，向下一个服务商 (只有一个时为同一个)
+      再发一个请求，先成功的结果胜出；首选请求失败时立即切换到下一个
+    - 落败的请求如果还在排队会被取消；已经发出的 SDK 调用是阻塞的，无法中途中断，
+      只能忽略其结果 (其耗时仍计入统计)
+
+    providers: [(服务商名, 模型)]，按优先顺序
+    request: request(服务商名, 模型, *args) 发出一次请求，失败时抛出异常
+    """
+
+    def __init__(self, providers, request, hedge=True, hedge_min_delay=1.0, hedge_max_delay=15.0,
+                 window=300, max_workers=8, on_hedge=None):
+        self.providers = list(providers)
+        self._request = request
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self._stats = {provider: ProviderStats(window) for provider in self.providers}
+        self._on_hedge = on_hedge
+        # 每个调用方最多同时占用两个线程 (首选请求 + 对冲请求)，落败的请求也会占用线程直到返回
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provider")
+
+    def record(self, provider, latency, ok):
+        stats = self._stats.get(provider)
+        if stats is not None:
+            stats.record(latency, ok)
+
+    def get_stats(self):
+        """各服务商的统计 {(服务商名, 模型): {"count", "error_rate", "p50", "p95"}}"""
+        return {provider: stats.snapshot() for provider, stats in self._stats.items()}
+
+    def ranked(self):
+        """按健康状况和延迟排序的服务商列表"""
+        stats = self.get_stats()
+
+        def key(provider):
+            snapshot = stats[provider]
+            unhealthy = snapshot["count"] >= MIN_SAMPLES and snapshot["error_rate"] >= UNHEALTHY_ERROR_RATE
+            return unhealthy, snapshot["p50"] or 0.0
+
+        return sorted(self.providers, key=key)
+
+    def hedge_delay(self, provider):
+        """首选请求等待多久后发出对冲请求: 该服务商近期的 p95 延迟，样本不足时取上限"""
+        p95 = self._stats[provider].snapshot()["p95"]
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _timed_request(self, provider, args):
+        started = time.monotonic()
+        try:
+            result = self._request(provider[0], provider[1], *args)
+        except Exception:
+            self.record(provider, time.monotonic() - started, False)
+            raise
+        self.record(provider, time.monotonic() - started, True)
+        return result
+
+    def call(self, *args):
+        """发出请求并返回 (服务商名, 结果)，所有服务商都失败时抛出 ProvidersFailedError"""
+        ranked = self.ranked()
+        if not ranked:
+            raise RuntimeError("没有可用的翻译服务商")
+
+        primary = ranked[0]
+        backups = iter(ranked[1:])
+        pending = {}
+        errors = []
+        last_failed = None
+
+        def launch(provider, hedged=False):
+            pending[self._pool.submit(self._timed_request, provider, args)] = (provider, hedged)
+
+        launch(primary)
+        hedge_at = time.monotonic() + self.hedge_delay(primary) if self.hedge else None
+
+        while True:
+            if not pending:
+                # 已发出的请求都失败了: 立即切换到下一个服务商
+                provider = next(backups, None)
+                if provider is None:
+                    raise ProvidersFailedError("; ".join(errors) or "翻译请求失败", provider=last_failed)
+                logger.info("切换翻译服务商: %s (%s)", provider[0], provider[1], extra={"provider": provider[0]})
+                launch(provider)
+                continue
+
+            timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 首选请求超过 p95 仍未返回，发出对冲请求 (每次调用最多一次)
+                hedge_at = None
+                provider = next(backups, None) if len(ranked) > 1 else primary
+                if provider is not None:
+                    logger.debug("翻译请求较慢，向 %s 发出对冲请求", provider[0], extra={"provider": provider[0]})
+                    launch(provider, hedged=True)
+                continue
+
+            for future in done:
+                provider, hedged = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider[0]}: {e}")
+                    last_failed = provider[0]
+                    if hedged and self._on_hedge:
+                        self._on_hedge(provider[0], "error")
+                    logger.warning("%s 翻译请求失败: %s", provider[0], e, extra={"provider": provider[0]})
+                    continue
+
+                for loser, (loser_provider, loser_hedged) in pending.items():
+                    loser.cancel()
+                    if loser_hedged and self._on_hedge:
+                        self._on_hedge(loser_provider[0], "lost")
+                if hedged and self._on_hedge:
+                    self._on_hedge(provider[0], "won")
+                return provider[0], result
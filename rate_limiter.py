@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器
+
+    rate: 每秒补充的令牌数，<= 0 表示不限速
+    capacity: 桶容量 (允许的突发请求数)
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def pause(self, seconds):
+        """服务端返回 429 时调用: 在 seconds 秒内暂停发放令牌，并清空已积攒的突发额度"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated_at = self._paused_until
+
+    def acquire(self, tokens=1):
+        """取出令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_time = self._paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class KeyedTokenBuckets:
+    """按 key (例如聊天 ID) 懒创建的一组令牌桶"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[key] = bucket
+            return bucket
+
+
+def per_minute(requests_per_minute, burst=1):
+    """按每分钟请求数创建令牌桶，<= 0 表示不限速"""
+    return TokenBucket(requests_per_minute / 60.0, capacity=burst)
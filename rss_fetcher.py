@@ -1,74 +1,270 @@
+import copy
 import feedparser
-import os
-import json
 import html2text
-import requests
-from urllib.parse import urlparse
-import ipaddress
-from bs4 import BeautifulSoup
-from config import PROXY_URL
+import io
+import logging
+import threading
+import time
+import xml.etree.ElementTree as ET
+import http_client
+from config import LAZY_PARSE_ENABLED, LAZY_PARSE_STOP_AFTER_SEEN, SEEN_HISTORY_SIZE, SEEN_BLOOM_BITS
+from metrics import FETCH_SECONDS, FETCH_TOTAL, PARSE_SECONDS, TWEETS_FETCHED
+from seen_index import SeenIndex
+from state_store import get_state_store
 
-STATE_FILE = "state.json"
+logger = logging.getLogger(__name__)
 
+# 条件请求 (If-None-Match / If-Modified-Since) 的响应计数
+FETCH_STATS = {"not_modified": 0, "modified": 0}
+_FETCH_STATS_LOCK = threading.Lock()
 
-def get_proxy_dict():
-    if PROXY_URL:
-        return {"http": PROXY_URL, "https": PROXY_URL}
-    return None
+# 尚未落盘的缓存校验信息: 必须等本次响应中的推文全部处理完才能保存，
+# 否则中途失败后下次请求会收到 304，未处理的推文就永远丢失了
+_PENDING_VALIDATORS = {}
+_PENDING_VALIDATORS_LOCK = threading.Lock()
 
-def is_private_url(url):
-    """检查 URL 是否指向私有 IP 地址 (内网)"""
-    try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        if not hostname:
-            return False
-            
-        # 常见本地标识
-        if hostname.lower() == 'localhost':
-            return True
-            
-        # 尝试判断是否为 IP 地址
-        try:
-            ip = ipaddress.ip_address(hostname)
-            return ip.is_private
-        except ValueError:
-            # 不是 IP 地址 (可能是域名)，暂不视为私有地址
-            return False
-    except Exception:
-        return False
-
-def load_state():
-    """加载整个状态字典"""
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-        except Exception as e:
-            print(f"读取状态文件出错: {e}")
-    return {}
-
-def save_state(state):
-    """保存整个状态字典"""
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"保存状态文件出错: {e}")
+# 每个 RSS 源的已处理推文 ID 集合 (内存缓存，持久化在状态存储中)
+_SEEN_INDEXES = {}
+_SEEN_INDEXES_LOCK = threading.Lock()
+
+
+def load_feed_state(rss_url):
+    """读取指定 RSS URL 的状态 (last_link / etag / last_modified)"""
+    return get_state_store().get(rss_url)
 
 def load_last_link(rss_url):
     """读取指定 RSS URL 的最后一条推文链接"""
-    state = load_state()
-    return state.get(rss_url)
+    return load_feed_state(rss_url).get("last_link")
+
+def _update_feed_state(rss_url, **fields):
+    get_state_store().update(rss_url, **fields)
+
+def get_entry_id(entry):
+    """推文的去重 ID: 优先使用 GUID，没有时退回链接"""
+    return entry.get('id') or entry.get('link', '')
+
+def get_seen_index(rss_url):
+    """获取指定 RSS URL 的已处理推文 ID 集合"""
+    with _SEEN_INDEXES_LOCK:
+        index = _SEEN_INDEXES.get(rss_url)
+        if index is None:
+            items, bloom_data = get_state_store().load_seen(rss_url)
+            index = SeenIndex(SEEN_HISTORY_SIZE, bloom_bits=SEEN_BLOOM_BITS, items=items, bloom_data=bloom_data)
+            _SEEN_INDEXES[rss_url] = index
+        return index
+
+def _mark_seen(rss_url, entry_ids):
+    """把推文 ID 记入已处理集合并持久化 (只追加这些 ID，布隆过滤器有变化时才重新保存)"""
+    if not entry_ids:
+        return
+    seen_index = get_seen_index(rss_url)
+    bloom_changed = False
+    for entry_id in entry_ids:
+        bloom_changed = seen_index.add(entry_id) or bloom_changed
+    get_state_store().add_seen(
+        rss_url, entry_ids, SEEN_HISTORY_SIZE,
+        bloom_data=seen_index.bloom_data() if bloom_changed else None,
+    )
+
+def save_last_link(rss_url, link, entry_id=None):
+    """保存指定 RSS URL 的最新处理推文链接，并将该推文记入已处理集合
+    当本次响应中最新的一条推文处理完成后，一并保存其缓存校验信息 (ETag / Last-Modified)
+    """
+    _mark_seen(rss_url, [entry_id or link])
+
+    fields = {"last_link": link}
+    with _PENDING_VALIDATORS_LOCK:
+        pending = _PENDING_VALIDATORS.get(rss_url)
+        if pending and pending["link"] == link:
+            fields.update(pending["validators"])
+            del _PENDING_VALIDATORS[rss_url]
+    _update_feed_state(rss_url, **fields)
+    logger.debug("进度已更新", extra={"feed": rss_url, "link": link})
+
+def _record_fetch_status(rss_url, status_code):
+    key = "not_modified" if status_code == 304 else "modified"
+    with _FETCH_STATS_LOCK:
+        FETCH_STATS[key] += 1
+    FETCH_TOTAL.inc(feed=rss_url, status=status_code)
+
+def get_fetch_stats():
+    """返回 RSS 请求的 304 / 200 计数，用于观察条件请求节省的流量"""
+    with _FETCH_STATS_LOCK:
+        return dict(FETCH_STATS)
+
+class _TweetHTMLConverter(html2text.HTML2Text):
+    """HTML -> Markdown 转换器，转换的同时收集 <img> 的 src，避免为提取图片再解析一遍"""
+
+    def __init__(self):
+        super().__init__(bodywidth=0)
+        self.ignore_links = False
+        self.ignore_images = True  # 图片单独提取，不出现在正文中
+        self.images = []
+        # 刚初始化完成时的属性快照，每次转换前据此恢复，不必重新执行 __init__
+        self._initial_state = dict(vars(self))
+
+    def reset_state(self):
+        # html2text 的解析状态不会在两次转换之间自动清空: 恢复快照中的字段，
+        # 列表 / 字典 (输出缓冲、标签栈、链接列表等) 换成新的空副本
+        for name, value in self._initial_state.items():
+            setattr(self, name, copy.copy(value) if isinstance(value, (list, dict)) else value)
+
+    def handle_tag(self, tag, attrs, start):
+        if start and tag == "img":
+            src = attrs.get("src")
+            if src:
+                self.images.append(src)
+        super().handle_tag(tag, attrs, start)
+
+
+# 每个线程复用一个转换器实例
+_CONVERTERS = threading.local()
+
+
+def html_to_text_and_images(description):
+    """单次解析推文 HTML，返回 (Markdown 文本, 图片 URL 列表)"""
+    converter = getattr(_CONVERTERS, "converter", None)
+    if converter is None:
+        converter = _TweetHTMLConverter()
+        _CONVERTERS.converter = converter
+
+    converter.reset_state()
+    try:
+        clean_content = converter.handle(description).strip()
+    except Exception as e:
+        logger.warning("解析推文内容出错: %s", e)
+        return "", []
+    return clean_content, list(converter.images)
+
+
+def _local_name(tag):
+    # "{http://purl.org/dc/elements/1.1/}creator" -> "creator"
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _scan_rss_items(content, seen_index, only_latest):
+    """增量扫描 RSS 2.0 文档，只为新推文构造条目，遇到连续多条已处理的推文即停止解析
+    返回 (Feed 标题, 新条目列表)；不是 RSS 2.0 文档时返回 None
+    """
+    feed_title = None
+    entries = []
+    consecutive_seen = 0
+    path = []
+    item = None
+
+    for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        name = _local_name(elem.tag)
+        if event == "start":
+            if not path and name != "rss":
+                return None
+            path.append(name)
+            if name == "item":
+                item = {}
+            continue
+
+        path.pop()
+        if item is not None and name != "item":
+            # 只记录 <item> 的直接子元素
+            if len(path) >= 1 and path[-1] == "item":
+                text = (elem.text or "").strip()
+                if name == "guid":
+                    item["id"] = text
+                elif name == "link":
+                    item["link"] = text
+                elif name == "description":
+                    item["description"] = elem.text or ""
+                elif name in ("author", "creator") and text:
+                    item.setdefault("author", text)
+                elif name == "pubDate":
+                    item["published"] = text
+            continue
+
+        if name == "title" and path == ["rss", "channel"]:
+            feed_title = (elem.text or "").strip()
+        elif name == "item" and item is not None:
+            entry, item = item, None
+            elem.clear()
+            if not entry.get("link"):
+                continue
+            if only_latest:
+                entries.append(entry)
+                break
+            if get_entry_id(entry) in seen_index:
+                consecutive_seen += 1
+                # 置顶推文等个别旧条目可能排在前面，连续遇到多条已处理推文才停止
+                if consecutive_seen >= LAZY_PARSE_STOP_AFTER_SEEN:
+                    break
+                continue
+            consecutive_seen = 0
+            entries.append(entry)
+
+    return feed_title or 'Unknown', entries
+
+
+def _lazy_scan(rss_url, content, only_latest):
+    """快速路径: 增量解析原始 XML，返回 (Feed 标题, 新条目列表)，无法使用时返回 None"""
+    seen_index = get_seen_index(rss_url)
+    if len(seen_index) == 0:
+        # 首次处理该源 (旧版游标迁移 / 新源的启动检查) 需要完整的条目列表
+        return None
+    try:
+        return _scan_rss_items(content, seen_index, only_latest)
+    except ET.ParseError as e:
+        logger.warning("增量解析 RSS 失败，改用 feedparser: %s", e, extra={"feed": rss_url})
+        return None
+
+
+def _migrate_cursor(rss_url, entries, last_link):
+    """旧版状态只有 last_link: 沿用游标方式找出新推文，
+    并把游标及之后的旧推文记入已处理集合，之后改用集合去重
+    """
+    found_cursor = False
+    seen_ids = []
+    entries_to_process = []
+    for entry in entries:
+        current_link = entry.get('link', '')
+        if current_link == last_link:
+            found_cursor = True
+        if found_cursor:
+            seen_ids.append(get_entry_id(entry))
+        elif current_link:
+            entries_to_process.append(entry)
+    # Feed 从新到旧排列，按从旧到新的顺序记入，最旧的先被淘汰
+    _mark_seen(rss_url, list(reversed(seen_ids)))
+    return entries_to_process
+
+
+def _select_new_entries(rss_url, entries, only_latest):
+    """从 feedparser 解析出的完整条目列表中挑出需要处理的条目"""
+    seen_index = get_seen_index(rss_url)
+
+    if len(seen_index) == 0:
+        last_link = load_last_link(rss_url)
+        # 游标迁移必须在启动检查之前完成: 启动检查推送的最新一条会记入集合，
+        # 集合不再为空后游标就不会再被使用，游标之前已推送过的推文会被当成新推文
+        if last_link:
+            entries_to_process = _migrate_cursor(rss_url, entries, last_link)
+            if not only_latest:
+                return entries_to_process
+        if only_latest and len(seen_index) == 0:
+            # 新源 (或游标已不在 Feed 中): 启动检查只推送最新一条，
+            # 其余已在 Feed 中的推文记为已处理，常规检查不再补发
+            _mark_seen(rss_url, [get_entry_id(entry) for entry in reversed(entries[1:]) if entry.get('link')])
+
+    if only_latest:
+        return [entries[0]]
+
+    # 逐条检查是否处理过 (O(1))，不依赖 Feed 的顺序和完整性
+    # 没有启动检查时，新源的集合为空，会处理 Feed 中的所有条目
+    entries_to_process = []
+    for entry in entries:
+        if not entry.get('link', ''):
+            continue
+        if get_entry_id(entry) in seen_index:
+            continue
+        entries_to_process.append(entry)
+    return entries_to_process
 
-def save_last_link(rss_url, link):
-    """保存指定 RSS URL 的最新处理推文链接"""
-    state = load_state()
-    state[rss_url] = link
-    save_state(state)
-    print(f"[{rss_url[:30]}...] 进度已更新")
 
 def fetch_new_tweets(rss_url, only_latest=False):
     """获取指定 RSS URL 自上次检查以来的新推文
@@ -76,52 +272,72 @@ def fetch_new_tweets(rss_url, only_latest=False):
     """
     if not rss_url:
 
-        print("错误: 传入的 RSS URL 为空")
+        logger.error("传入的 RSS URL 为空")
         return []
 
-    print(f"正在检查 RSS: {rss_url} ...")
+    logger.debug("正在检查 RSS", extra={"feed": rss_url})
     
     feed = None
+    scanned = None
+    validators = {}
     try:
-        proxies = get_proxy_dict()
-        
-        # 如果是内网地址，强制不使用代理
-        if is_private_url(rss_url):
-            # print(f"检测到内网地址 {rss_url}，跳过代理配置")
-            proxies = None
-            
-        response = requests.get(rss_url, proxies=proxies, timeout=20)
+        # 启动检查需要拿到最新一条推文，不发送条件请求头
+        headers = {}
+        if not only_latest:
+            feed_state = load_feed_state(rss_url)
+            if feed_state.get("etag"):
+                headers["If-None-Match"] = feed_state["etag"]
+            if feed_state.get("last_modified"):
+                headers["If-Modified-Since"] = feed_state["last_modified"]
+
+        # 共享连接池会自动处理代理 (内网地址强制不使用代理)
+        with FETCH_SECONDS.time(feed=rss_url):
+            response = http_client.get(rss_url, headers=headers, timeout=20)
+        if response.status_code == 304:
+            _record_fetch_status(rss_url, response.status_code)
+            logger.debug("RSS 未变化 (304)", extra={"feed": rss_url})
+            return []
+
         response.raise_for_status()
-        feed = feedparser.parse(response.content)
+        _record_fetch_status(rss_url, response.status_code)
+        parse_started = time.perf_counter()
+
+        if response.headers.get("ETag"):
+            validators["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            validators["last_modified"] = response.headers["Last-Modified"]
+
+        # 优先增量解析，只处理新推文；非 RSS 2.0 (如 Atom) 或解析失败时交给 feedparser
+        if LAZY_PARSE_ENABLED:
+            scanned = _lazy_scan(rss_url, response.content, only_latest)
+        if scanned is None:
+            feed = feedparser.parse(response.content)
     except Exception as e:
-        print(f"请求 RSS 失败: {e}")
+        logger.warning("请求 RSS 失败: %s", e, extra={"feed": rss_url})
+        FETCH_TOTAL.inc(feed=rss_url, status="error")
+        parse_started = time.perf_counter()
         try:
-            print("尝试直接使用 feedparser...")
+            logger.info("尝试直接使用 feedparser...", extra={"feed": rss_url})
             feed = feedparser.parse(rss_url)
         except Exception:
             return []
 
-    if not feed or not feed.entries:
-        print(f"未获取到任何推文: {rss_url}")
-        return []
+    if scanned is not None:
+        feed_title, entries_to_process = scanned
+        if only_latest and not entries_to_process:
+            logger.info("未获取到任何推文", extra={"feed": rss_url})
+            return []
+    else:
+        if not feed or not feed.entries:
+            logger.info("未获取到任何推文", extra={"feed": rss_url})
+            return []
+
+        feed_data = feed.get('feed', {})
+        feed_title = feed_data.get('title', 'Unknown') if isinstance(feed_data, dict) else 'Unknown'
+        entries_to_process = _select_new_entries(rss_url, feed.entries, only_latest)
 
     if only_latest:
-        print(f"[{rss_url}] 启动检查，仅获取最新一条推文。")
-        entries_to_process = [feed.entries[0]]
-    else:
-        last_link = load_last_link(rss_url)
-        entries_to_process = []
-        
-        # 遍历所有推文，直到找到上次处理的链接
-        # 如果 last_link 为 None (首次运行/新Feed)，则会处理 Feed 中的所有条目
-        # 这对于追溯历史或初始化状态是合理的
-        for entry in feed.entries:
-            current_link = entry.get('link', '')
-            if current_link == last_link:
-                break
-            if not current_link:
-                continue
-            entries_to_process.append(entry)
+        logger.debug("启动检查，仅获取最新一条推文", extra={"feed": rss_url})
 
     new_tweets = []
 
@@ -133,33 +349,14 @@ def fetch_new_tweets(rss_url, only_latest=False):
         # 强制转换为字符串
         description = str(entry.get('description', ''))
         
-        # 1. 提取图片
-        images = []
-        try:
-            soup = BeautifulSoup(description, 'html.parser')
-            for img in soup.find_all('img'):
-                # 确保 img 是 Tag 对象
-                if hasattr(img, 'get'):
-                    src = img.get('src')
-                    if src:
-                        # 过滤掉一些特定的跟踪像素或小图标（可选）
-                        images.append(src)
-        except Exception as e:
-            print(f"解析图片出错: {e}")
-
-        # 2. 清理文本
-        h = html2text.HTML2Text()
-        h.ignore_links = False 
-        h.body_width = 0
-        h.ignore_images = True # 忽略原HTML中的图片标签，因为我们已经提取了
-        clean_content = h.handle(description).strip()
+        # 一次解析同时提取图片和清理后的文本
+        clean_content, images = html_to_text_and_images(description)
         
-        # 安全获取作者
-        feed_data = feed.get('feed', {})
-        feed_title = feed_data.get('title', 'Unknown') if isinstance(feed_data, dict) else 'Unknown'
+        # 安全获取作者 (Feed 标题只在循环外读取一次)
         author = entry.get('author', feed_title)
 
         tweet_data = {
+            "id": get_entry_id(entry),
             "link": current_link,
             "author": author,
             "content": clean_content,
@@ -168,6 +365,22 @@ def fetch_new_tweets(rss_url, only_latest=False):
         }
         new_tweets.append(tweet_data)
 
+    PARSE_SECONDS.observe(time.perf_counter() - parse_started, feed=rss_url)
+    if new_tweets:
+        TWEETS_FETCHED.inc(len(new_tweets), feed=rss_url)
+
+    # 保存缓存校验信息，下次请求即可命中 304
+    if validators and not only_latest:
+        if new_tweets:
+            # 等最新一条推文 (new_tweets[0]) 的进度保存时再落盘
+            with _PENDING_VALIDATORS_LOCK:
+                _PENDING_VALIDATORS[rss_url] = {
+                    "link": new_tweets[0]["link"],
+                    "validators": validators,
+                }
+        else:
+            _update_feed_state(rss_url, **validators)
+
     # 返回按时间正序排列的推文（旧 -> 新）
     # 对于首次运行只有一条，reversed 也没影响
     return list(reversed(new_tweets))
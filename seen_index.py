@@ -0,0 +1,74 @@
+import hashlib
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """固定大小的布隆过滤器，用于记录已被 LRU 淘汰的历史推文 ID
+
+    只会误判"已见过"(概率由位数和条目数决定)，不会漏判。
+    """
+
+    def __init__(self, num_bits, num_hashes=4, data=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        size = (num_bits + 7) // 8
+        self.bits = bytearray(data) if data and len(data) == size else bytearray(size)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+class SeenIndex:
+    """单个 RSS 源的已处理推文 ID 集合
+
+    最近的 max_size 个 ID 保存在 LRU 中 (O(1) 查询)，
+    被淘汰的 ID 可选写入布隆过滤器，以低成本覆盖更长的历史。
+    """
+
+    def __init__(self, max_size, bloom_bits=0, items=None, bloom_data=None):
+        self.max_size = max(1, max_size)
+        self._recent = OrderedDict((item, None) for item in (items or []))
+        self._bloom = BloomFilter(bloom_bits, data=bloom_data) if bloom_bits > 0 else None
+        self._evict()
+
+    def __contains__(self, item):
+        if item in self._recent:
+            return True
+        return self._bloom is not None and item in self._bloom
+
+    def __len__(self):
+        return len(self._recent)
+
+    def add(self, item):
+        """记录一个 ID，返回 True 表示有 ID 被淘汰进布隆过滤器 (需要重新保存过滤器)"""
+        if item in self._recent:
+            self._recent.move_to_end(item)
+            return False
+        self._recent[item] = None
+        return self._evict()
+
+    def _evict(self):
+        evicted_any = False
+        while len(self._recent) > self.max_size:
+            evicted, _ = self._recent.popitem(last=False)
+            if self._bloom is not None:
+                self._bloom.add(evicted)
+                evicted_any = True
+        return evicted_any
+
+    def bloom_data(self):
+        return self._bloom.to_bytes() if self._bloom is not None else None
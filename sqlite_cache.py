@@ -0,0 +1,93 @@
+import threading
+import time
+
+from state_store import connect_sqlite
+
+
+class SQLiteCache:
+    """基于 SQLite 的持久化键值缓存，支持过期时间 (TTL) 和按最近访问时间淘汰 (LRU)
+
+    多个缓存可共用一个数据库文件，各自使用独立的表。
+    """
+
+    def __init__(self, path, table, ttl=0, max_entries=0):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+            )
+        (self._count,) = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            with self._conn:
+                if self.ttl and created_at + self.ttl < now:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._count -= 1
+                    return None
+                self._conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    f"UPDATE {self.table} SET value = ?, created_at = ?, accessed_at = ? WHERE key = ?",
+                    (value, now, now, key),
+                )
+                if cursor.rowcount == 0:
+                    self._conn.execute(
+                        f"INSERT INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                        (key, value, now, now),
+                    )
+                    self._count += 1
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._count -= cursor.rowcount
+
+    def _evict(self):
+        if self.ttl:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._count -= cursor.rowcount
+
+        if self.max_entries and self._count > self.max_entries:
+            # 一次淘汰到上限的 90%，避免每次写入都触发淘汰
+            excess = self._count - int(self.max_entries * 0.9)
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self._count -= cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._count
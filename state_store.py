@@ -0,0 +1,302 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from config import STATE_BACKEND, STATE_DB, STATE_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def connect_sqlite(path):
+    """打开 SQLite 数据库 (WAL 模式)，可在多个线程间共享，调用方需自行加锁"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 模式下 NORMAL 即可保证崩溃后数据库一致，只可能丢失最后一次提交
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class StateStore:
+    """RSS 源状态存储接口
+
+    每个 RSS 源对应一个字段字典 (last_link / etag / last_modified 等)。
+    实现类需在内存中缓存当前状态，读操作不访问磁盘。
+    已处理推文 ID 单独存取，记录一条推文只追加该 ID，不改写整个源的状态。
+    """
+
+    def get(self, rss_url):
+        raise NotImplementedError
+
+    def update(self, rss_url, **fields):
+        raise NotImplementedError
+
+    def load_seen(self, rss_url):
+        """返回 (已处理 ID 列表 (旧 -> 新), 布隆过滤器数据或 None)"""
+        raise NotImplementedError
+
+    def add_seen(self, rss_url, entry_ids, max_size, bloom_data=None):
+        """追加已处理 ID，只保留最新的 max_size 个；bloom_data 不为 None 时一并保存布隆过滤器"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JSONStateStore(StateStore):
+    """基于 state.json 的状态存储，写入时先写临时文件再原子替换"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache = _load_json_state(path)
+
+    def get(self, rss_url):
+        with self._lock:
+            return dict(self._cache.get(rss_url, {}))
+
+    def update(self, rss_url, **fields):
+        with self._lock:
+            feed_state = dict(self._cache.get(rss_url, {}))
+            feed_state.update(fields)
+            self._cache[rss_url] = feed_state
+            _atomic_write_json(self.path, self._cache)
+
+    def load_seen(self, rss_url):
+        with self._lock:
+            feed_state = self._cache.get(rss_url, {})
+            return list(feed_state.get("seen") or []), _decode_bloom(feed_state.get("seen_bloom"))
+
+    def add_seen(self, rss_url, entry_ids, max_size, bloom_data=None):
+        # JSON 后端每次写入都要重写整个文件，只适合源较少的场景
+        with self._lock:
+            feed_state = dict(self._cache.get(rss_url, {}))
+            seen = dict.fromkeys(feed_state.get("seen") or [])
+            for entry_id in entry_ids:
+                seen.pop(entry_id, None)
+                seen[entry_id] = None
+            feed_state["seen"] = list(seen)[-max_size:]
+            if bloom_data is not None:
+                feed_state["seen_bloom"] = base64.b64encode(bloom_data).decode("ascii")
+            self._cache[rss_url] = feed_state
+            _atomic_write_json(self.path, self._cache)
+
+
+class SQLiteStateStore(StateStore):
+    """基于 SQLite (WAL) 的状态存储
+
+    每个 RSS 源一行，按 URL 主键更新，单次写入只涉及一行且在事务内完成。
+    已处理推文 ID 存在 seen 表中 (每个 ID 一行，按 seq 排序)，追加时删除超出上限的最旧 ID。
+    """
+
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feed_state ("
+                "url TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "url TEXT NOT NULL, "
+                "entry_id TEXT NOT NULL, "
+                "seq INTEGER NOT NULL, "
+                "PRIMARY KEY (url, entry_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS seen_order ON seen (url, seq)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_bloom ("
+                "url TEXT PRIMARY KEY, "
+                "data BLOB NOT NULL)"
+            )
+
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+
+        self._cache = {}
+        for url, data in self._conn.execute("SELECT url, data FROM feed_state").fetchall():
+            try:
+                feed_state = json.loads(data)
+            except ValueError:
+                logger.warning("状态数据损坏，已忽略", extra={"feed": url})
+                continue
+            if "seen" in feed_state or "seen_bloom" in feed_state:
+                feed_state = self._migrate_seen(url, feed_state)
+            self._cache[url] = feed_state
+
+    def _migrate_seen(self, url, feed_state):
+        """旧版把已处理 ID 列表和布隆过滤器存在源状态中，移到 seen / seen_bloom 表"""
+        feed_state = dict(feed_state)
+        seen = feed_state.pop("seen", None) or []
+        bloom_data = _decode_bloom(feed_state.pop("seen_bloom", None))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen (url, entry_id, seq) VALUES (?, ?, ?)",
+                [(url, entry_id, seq) for seq, entry_id in enumerate(seen, 1)],
+            )
+            if bloom_data is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO seen_bloom (url, data) VALUES (?, ?)", (url, bloom_data)
+                )
+            self._conn.execute(
+                "UPDATE feed_state SET data = ? WHERE url = ?",
+                (json.dumps(feed_state, ensure_ascii=False), url),
+            )
+        return feed_state
+
+    def _migrate_from_json(self, json_path):
+        """一次性迁移: 数据库为空且存在旧的 state.json 时导入，导入后重命名旧文件"""
+        if not os.path.exists(json_path):
+            return
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM feed_state").fetchone()
+        if count:
+            return
+
+        legacy_state = _load_json_state(json_path)
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO feed_state (url, data, updated_at) VALUES (?, ?, ?)",
+                [
+                    (url, json.dumps(data, ensure_ascii=False), now)
+                    for url, data in legacy_state.items()
+                ],
+            )
+
+        migrated_path = f"{json_path}.migrated"
+        try:
+            os.replace(json_path, migrated_path)
+        except OSError as e:
+            logger.warning("重命名旧状态文件失败: %s", e)
+        logger.info("已从 %s 迁移 %d 个 RSS 源的状态到 %s", json_path, len(legacy_state), self.path)
+
+    def get(self, rss_url):
+        with self._lock:
+            return dict(self._cache.get(rss_url, {}))
+
+    def update(self, rss_url, **fields):
+        with self._lock:
+            feed_state = dict(self._cache.get(rss_url, {}))
+            feed_state.update(fields)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO feed_state (url, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                    (rss_url, json.dumps(feed_state, ensure_ascii=False), time.time()),
+                )
+            # 提交成功后再更新内存缓存，保证缓存与磁盘一致
+            self._cache[rss_url] = feed_state
+
+    def load_seen(self, rss_url):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id FROM seen WHERE url = ? ORDER BY seq", (rss_url,)
+            ).fetchall()
+            bloom = self._conn.execute(
+                "SELECT data FROM seen_bloom WHERE url = ?", (rss_url,)
+            ).fetchone()
+        return [entry_id for (entry_id,) in rows], (bytes(bloom[0]) if bloom else None)
+
+    def add_seen(self, rss_url, entry_ids, max_size, bloom_data=None):
+        with self._lock:
+            with self._conn:
+                (seq,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM seen WHERE url = ?", (rss_url,)
+                ).fetchone()
+                # 已存在的 ID 移到最新位置，与内存中的 LRU 顺序一致
+                self._conn.executemany(
+                    "INSERT INTO seen (url, entry_id, seq) VALUES (?, ?, ?) "
+                    "ON CONFLICT(url, entry_id) DO UPDATE SET seq = excluded.seq",
+                    [(rss_url, entry_id, seq + i) for i, entry_id in enumerate(entry_ids, 1)],
+                )
+                self._conn.execute(
+                    "DELETE FROM seen WHERE url = ? AND seq <= "
+                    "(SELECT seq FROM seen WHERE url = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                    (rss_url, rss_url, max_size),
+                )
+                if bloom_data is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO seen_bloom (url, data) VALUES (?, ?)", (rss_url, bloom_data)
+                    )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _normalize_feed_state(value):
+    """兼容旧格式: 旧版 state.json 中每个源只保存一个链接字符串"""
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, str):
+        return {"last_link": value}
+    return {}
+
+
+def _decode_bloom(value):
+    if not value:
+        return None
+    try:
+        return base64.b64decode(value)
+    except ValueError:
+        return None
+
+
+def _load_json_state(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return {url: _normalize_feed_state(value) for url, value in data.items()}
+        except Exception as e:
+            logger.error("读取状态文件出错: %s", e)
+    return {}
+
+
+def _atomic_write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".state-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("保存状态文件出错: %s", e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_state_store():
+    """按 STATE_BACKEND 创建全局状态存储 (首次调用时初始化)"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            if STATE_BACKEND == "json":
+                _STORE = JSONStateStore(STATE_FILE)
+            else:
+                if STATE_BACKEND != "sqlite":
+                    logger.warning("未知 STATE_BACKEND: %s，使用 sqlite", STATE_BACKEND)
+                _STORE = SQLiteStateStore(STATE_DB, legacy_json_path=STATE_FILE)
+        return _STORE
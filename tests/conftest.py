@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# 在导入 config 之前把状态、缓存数据库指向临时目录，测试不会在仓库中留下 state.db / cache.db
+_DATA_DIR = tempfile.TemporaryDirectory(prefix="rss-bot-tests-")
+os.environ.setdefault("STATE_FILE", os.path.join(_DATA_DIR.name, "state.json"))
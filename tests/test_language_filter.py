@@ -0,0 +1,43 @@
+import pytest
+
+from language_filter import skip_translation_reason
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "Meeting with 马斯克 today",
+        "Check out 人工智能 news today",
+        "Just landed in 北京, the weather is great",
+        "Big announcement from 阿里巴巴 and 腾讯 about cloud pricing",
+        "東京で新しいカフェを見つけました",
+        "오늘 서울 날씨가 좋네요",
+    ],
+)
+def test_translates_foreign_text_mentioning_chinese_terms(content):
+    assert skip_translation_reason(content) is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "今天发布了新的 GPT 模型，效果很好",
+        "马斯克刚刚宣布 Tesla 将在上海建新工厂 https://t.co/abc",
+        "周末去看了 [这部电影](https://example.com/movie)，推荐",
+        "大家好",
+    ],
+)
+def test_skips_chinese_text(content):
+    assert skip_translation_reason(content) == "chinese"
+
+
+@pytest.mark.parametrize(
+    "content, reason",
+    [
+        ("", "empty"),
+        ("https://t.co/abc @someone #tag", "empty"),
+        ("gm", "short"),
+    ],
+)
+def test_skips_empty_and_short_text(content, reason):
+    assert skip_translation_reason(content) == reason
@@ -0,0 +1,71 @@
+import pytest
+
+import pipeline
+from outbox import Outbox
+
+FEED_URL = "http://rsshub.local/twitter/user/example"
+TWEET = {
+    "id": "https://x.com/example/status/1",
+    "link": "https://x.com/example/status/1",
+    "author": "example",
+    "content": "hello",
+    "images": [],
+}
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    outbox = Outbox(str(tmp_path / "state.db"))
+    monkeypatch.setattr(pipeline, "get_outbox", lambda: outbox)
+    monkeypatch.setattr(pipeline, "get_delivery_targets", lambda: ["telegram"])
+    monkeypatch.setattr(pipeline, "save_last_link", lambda *args, **kwargs: None)
+    return outbox
+
+
+@pytest.fixture
+def sends(monkeypatch):
+    sends = []
+
+    def send(link, targets, **kwargs):
+        sends.append((link, tuple(targets)))
+        return {target: None for target in targets}
+
+    monkeypatch.setattr(pipeline, "send_telegram_message", send)
+    return sends
+
+
+def test_new_item_is_not_due_for_retry(outbox):
+    outbox.enqueue(FEED_URL, TWEET, "", ["telegram"])
+    assert outbox.due_items() == []
+
+
+def test_stale_retry_snapshot_does_not_resend(outbox, sends, monkeypatch):
+    outbox_id = outbox.enqueue(FEED_URL, TWEET, "", ["telegram"])
+    # 重试线程在流水线推送之前读取到同一条推文
+    snapshot = [(outbox_id, FEED_URL, TWEET, "", ["telegram"])]
+    monkeypatch.setattr(outbox, "due_items", lambda: snapshot)
+
+    pipeline._deliver_item(outbox_id, FEED_URL, TWEET, "", ["telegram"])
+    pipeline.retry_pending_deliveries()
+
+    assert sends == [(TWEET["link"], ("telegram",))]
+    assert not outbox.contains(FEED_URL, TWEET["id"])
+
+
+def test_removed_target_is_abandoned(outbox, sends):
+    outbox_id = outbox.enqueue(FEED_URL, TWEET, "", ["telegram", "feishu:removed"])
+
+    assert pipeline._deliver_item(outbox_id, FEED_URL, TWEET, "", ["telegram", "feishu:removed"])
+    assert sends == [(TWEET["link"], ("telegram",))]
+    assert not outbox.contains(FEED_URL, TWEET["id"])
+
+
+def test_target_without_result_counts_as_failed_attempt(outbox, monkeypatch):
+    monkeypatch.setattr(pipeline, "send_telegram_message", lambda **kwargs: {})
+    outbox_id = outbox.enqueue(FEED_URL, TWEET, "", ["telegram"])
+
+    assert not pipeline._deliver_item(outbox_id, FEED_URL, TWEET, "", ["telegram"])
+    (attempts, last_error) = outbox._conn.execute(
+        "SELECT attempts, last_error FROM outbox_delivery WHERE outbox_id = ?", (outbox_id,)
+    ).fetchone()
+    assert attempts == 1 and last_error
@@ -0,0 +1,77 @@
+import pytest
+
+import rss_fetcher
+from state_store import JSONStateStore
+
+FEED_URL = "http://rsshub.local/twitter/user/example"
+
+
+def _rss(count):
+    """从新到旧排列的 RSS 2.0 文档，第 0 条最新"""
+    items = "".join(
+        f"<item><title>t{i}</title><description>tweet {i}</description>"
+        f"<link>https://x.com/example/status/{i}</link>"
+        f"<guid>https://x.com/example/status/{i}</guid></item>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>example</title>{items}</channel></rss>'.encode()
+
+
+class _Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture(params=[True, False], ids=["lazy", "feedparser"])
+def store(request, tmp_path, monkeypatch):
+    store = JSONStateStore(str(tmp_path / "state.json"))
+    monkeypatch.setattr(rss_fetcher, "get_state_store", lambda: store)
+    monkeypatch.setattr(rss_fetcher, "_SEEN_INDEXES", {})
+    monkeypatch.setattr(rss_fetcher, "_PENDING_VALIDATORS", {})
+    monkeypatch.setattr(rss_fetcher, "LAZY_PARSE_ENABLED", request.param)
+    monkeypatch.setattr(rss_fetcher.http_client, "get", lambda url, **kwargs: _Response(_rss(20)))
+    return store
+
+
+def _deliver(tweets):
+    for tweet in tweets:
+        rss_fetcher.save_last_link(FEED_URL, tweet["link"], entry_id=tweet["id"])
+
+
+def _status_ids(tweets):
+    return [int(tweet["link"].rsplit("/", 1)[1]) for tweet in tweets]
+
+
+def test_startup_on_new_feed_does_not_backfill(store):
+    startup = rss_fetcher.fetch_new_tweets(FEED_URL, only_latest=True)
+    assert _status_ids(startup) == [0]
+    _deliver(startup)
+
+    assert rss_fetcher.fetch_new_tweets(FEED_URL) == []
+
+
+def test_startup_after_upgrade_from_last_link_cursor(store):
+    # 旧版只记录了最后推送的链接: 第 5 条及更早的推文已推送过，第 0~4 条是停机期间的新推文
+    store.update(FEED_URL, last_link="https://x.com/example/status/5")
+
+    startup = rss_fetcher.fetch_new_tweets(FEED_URL, only_latest=True)
+    assert _status_ids(startup) == [0]
+    _deliver(startup)
+
+    assert _status_ids(rss_fetcher.fetch_new_tweets(FEED_URL)) == [4, 3, 2, 1]
+
+
+def test_regular_check_after_upgrade_without_startup(store):
+    store.update(FEED_URL, last_link="https://x.com/example/status/2")
+
+    new_tweets = rss_fetcher.fetch_new_tweets(FEED_URL)
+    assert _status_ids(new_tweets) == [1, 0]
+    _deliver(new_tweets)
+
+    assert rss_fetcher.fetch_new_tweets(FEED_URL) == []
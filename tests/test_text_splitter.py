@@ -0,0 +1,16 @@
+from text_splitter import split_text, split_text_with_separators
+
+
+def test_chunks_respect_limit_and_prefer_paragraphs():
+    text = "First paragraph here.\n\nSecond paragraph is here.\n\nThird one."
+    assert split_text(text, 30) == ["First paragraph here.", "Second paragraph is here.", "Third one."]
+
+
+def test_separators_rebuild_original_text():
+    text = "Para one. It has sentences.\n\nPara two.\nLine two.\n\n\nPara three " + "word " * 20
+    chunks = split_text_with_separators(text, 40)
+    assert len(chunks) > 2
+    assert all(len(chunk) <= 40 for chunk, _ in chunks)
+    assert chunks[0] == ("Para one. It has sentences.", "\n\n")
+    assert chunks[-1][1] == ""
+    assert "".join(chunk + separator for chunk, separator in chunks) == text.strip()
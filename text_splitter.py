@@ -0,0 +1,104 @@
+import re
+
+# 切分边界按优先级排列: 段落 > 换行 > 句末标点 > 空白；匹配结束处即切分点，分隔符留在前一块末尾
+_BOUNDARIES = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"[。！？!?…]+[”’」』)）]*|[.;；]+(?=\s)"),
+    re.compile(r"\s+"),
+)
+
+
+def _cut(text, pattern):
+    """按 pattern 的匹配结束位置切开，各段拼接后与原文完全相同"""
+    pieces = []
+    start = 0
+    for match in pattern.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _hard_split(text, limit, measure):
+    """没有可用的边界时逐字切分 (measure 需要对逐字求和成立)"""
+    chunks = []
+    current = ""
+    size = 0
+    for char in text:
+        char_size = measure(char)
+        if current and size + char_size > limit:
+            chunks.append(current)
+            current = ""
+            size = 0
+        current += char
+        size += char_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split(text, limit, measure, level):
+    if measure(text.strip()) <= limit:
+        return [text]
+    if level >= len(_BOUNDARIES):
+        return _hard_split(text, limit, measure)
+
+    pieces = _cut(text, _BOUNDARIES[level])
+    if len(pieces) < 2:
+        return _split(text, limit, measure, level + 1)
+
+    # 贪心合并相邻的段，单段仍然超长时换用更细的边界
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if measure((current + piece).strip()) <= limit:
+            current += piece
+            continue
+        if current:
+            chunks.append(current)
+        if measure(piece.strip()) <= limit:
+            current = piece
+        else:
+            chunks.extend(_split(piece, limit, measure, level + 1))
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text, limit, measure=len):
+    """把纯文本切成 measure 不超过 limit 的若干块，按原顺序返回 (已去除首尾空白)
+
+    优先在段落、换行、句末标点处切分，其次是空白，实在没有边界时才逐字切分；
+    切分在转义 HTML 之前进行，每块单独转义后不会出现被截断的标签或实体。
+    measure: 计算长度的函数，例如按转义后的 UTF-16 长度计算 Telegram 消息长度
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    chunks = (chunk.strip() for chunk in _split(text, limit, measure, 0))
+    return [chunk for chunk in chunks if chunk]
+
+
+def split_text_with_separators(text, limit, measure=len):
+    """同 split_text，但返回 [(块, 该块之后的原始分隔空白)]，最后一块的分隔为空字符串
+
+    把各块 (或各块的译文) 按原分隔拼回去即可保留段落空行和换行
+    """
+    text = (text or "").strip()
+    chunks = split_text(text, limit, measure)
+    # 各块是原文中按顺序排列、去掉首尾空白的连续片段，块与块之间只有空白
+    starts = []
+    position = 0
+    for chunk in chunks:
+        start = text.find(chunk, position)
+        starts.append(start)
+        position = start + len(chunk)
+    separators = [
+        text[start + len(chunk):next_start]
+        for chunk, start, next_start in zip(chunks, starts, starts[1:])
+    ]
+    return list(zip(chunks, separators + [""]))
@@ -1,61 +1,94 @@
 from google import genai
 from google.genai import types
 from openai import OpenAI
-from config import GEMINI_API_KEY, GEMINI_BASE_URL, AI_PROVIDER, OPENAI_API_KEY, OPENAI_BASE_URL
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_BASE_URL,
+    GEMINI_MODEL,
+    AI_PROVIDER,
+    AI_PROVIDERS,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_MODEL,
+    TRANSLATION_CACHE_ENABLED,
+    TRANSLATION_CACHE_DB,
+    TRANSLATION_CACHE_TTL,
+    TRANSLATION_CACHE_MAX_ENTRIES,
+    TRANSLATION_BATCH_TOKEN_BUDGET,
+    TRANSLATION_BATCH_MAX_ITEMS,
+    TRANSLATION_CHUNK_CHARS,
+    GEMINI_RPM,
+    OPENAI_RPM,
+    PROVIDER_STATS_WINDOW,
+    TRANSLATE_WORKERS,
+    TRANSLATION_HEDGE_ENABLED,
+    TRANSLATION_HEDGE_MAX_DELAY,
+    TRANSLATION_HEDGE_MIN_DELAY,
+    TRANSLATION_SKIP_ENABLED,
+)
+from metrics import (
+    TRANSLATION_CACHE,
+    TRANSLATION_FAILURES,
+    TRANSLATION_HEDGES,
+    TRANSLATION_REQUESTS,
+    TRANSLATION_RETRIES,
+    TRANSLATION_SKIPPED,
+    gauge,
+)
+from language_filter import skip_translation_reason
+from provider_router import ProviderRouter
+from rate_limiter import per_minute
+from sqlite_cache import SQLiteCache
+from text_splitter import split_text_with_separators
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import threading
 import time
-import textwrap
+
+logger = logging.getLogger(__name__)
 
 gemini_client = None
 openai_client = None
 
-# 初始化客户端
-if AI_PROVIDER == "gemini":
+# 初始化客户端: AI_PROVIDERS 中的服务商都会创建客户端，由路由器在它们之间分配请求
+if "gemini" in AI_PROVIDERS:
     if GEMINI_API_KEY:
         try:
             http_options = None
             if GEMINI_BASE_URL:
                 # 如果配置了 Base URL，设置 base_url
                 http_options = {'base_url': GEMINI_BASE_URL}
-                print(f"使用自定义 Gemini Base URL: {GEMINI_BASE_URL}")
+                logger.info("使用自定义 Gemini Base URL: %s", GEMINI_BASE_URL)
                 
             gemini_client = genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)  # type: ignore
         except Exception as e:
-            print(f"初始化 Gemini 客户端失败: {e}")
+            logger.error("初始化 Gemini 客户端失败: %s", e)
     else:
-        print("警告: 选择了 gemini 接口，但未配置 GEMINI_API_KEY，无法进行翻译。")
+        logger.warning("选择了 gemini 接口，但未配置 GEMINI_API_KEY，无法进行翻译。")
 
-elif AI_PROVIDER == "openai":
+if "openai" in AI_PROVIDERS:
     if OPENAI_API_KEY:
         try:
             kwargs = {"api_key": OPENAI_API_KEY}
             if OPENAI_BASE_URL:
                 kwargs["base_url"] = OPENAI_BASE_URL
-                print(f"使用自定义 OpenAI Base URL: {OPENAI_BASE_URL}")
+                logger.info("使用自定义 OpenAI Base URL: %s", OPENAI_BASE_URL)
             openai_client = OpenAI(**kwargs)
         except Exception as e:
-            print(f"初始化 OpenAI 客户端失败: {e}")
+            logger.error("初始化 OpenAI 客户端失败: %s", e)
     else:
-        print("警告: 选择了 openai 接口，但未配置 OPENAI_API_KEY，无法进行翻译。")
-else:
-    print(f"警告: 未知 AI_PROVIDER: {AI_PROVIDER}")
+        logger.warning("选择了 openai 接口，但未配置 OPENAI_API_KEY，无法进行翻译。")
 
-def translate_tweet(content):
-    """
-    使用 AI 翻译推文内容
-    如果失败，最多重试 3 次
-    """
-    local_gemini_client = gemini_client
-    local_openai_client = openai_client
-    
-    if AI_PROVIDER == "gemini" and not local_gemini_client:
-        return "无法翻译 (缺少 Gemini API Key)"
-    elif AI_PROVIDER == "openai" and not local_openai_client:
-        return "无法翻译 (缺少 OpenAI API Key)"
+for _provider in AI_PROVIDERS:
+    if _provider not in ("gemini", "openai"):
+        logger.warning("未知 AI_PROVIDER: %s", _provider)
 
-    max_retries = 3
-    base_wait_time = 2  # 初始等待时间 2秒
+_MODELS = {"gemini": GEMINI_MODEL, "openai": OPENAI_MODEL}
+_PROVIDER_NAMES = {"gemini": "Gemini", "openai": "OpenAI"}
 
-    prompt = f"""
+PROMPT_TEMPLATE = """
     请将以下推特推文内容翻译成流畅、自然的中文。
     
     要求：
@@ -68,47 +101,488 @@ def translate_tweet(content):
     {content}
     """
 
-    for attempt in range(max_retries + 1):
+BATCH_PROMPT_TEMPLATE = """
+    请将下面 JSON 数组中的 {count} 条推特推文分别翻译成流畅、自然的中文。
+
+    要求：
+    1. 保持原推文的语气和情感。
+    2. 不要直译，要符合中文阅读习惯。
+    3. 必须保留原文中的所有链接 (URL)、Hashtag (#标签) 和提及 (@用户)。
+    4. 只输出一个 JSON 字符串数组，长度为 {count}，第 i 项是第 i 条推文的译文，顺序保持一致。
+    5. 不要输出解释、代码块标记或其他文字。
+
+    推文内容：
+    {contents}
+    """
+
+# 翻译结果缓存: 相同 (服务商, 模型, 提示词, 内容) 直接复用，跳过 API 调用
+_translation_cache = None
+if TRANSLATION_CACHE_ENABLED:
+    try:
+        _translation_cache = SQLiteCache(
+            TRANSLATION_CACHE_DB,
+            "translation_cache",
+            ttl=TRANSLATION_CACHE_TTL,
+            max_entries=TRANSLATION_CACHE_MAX_ENTRIES,
+        )
+    except Exception as e:
+        logger.warning("初始化翻译缓存失败，将不使用缓存: %s", e)
+
+# 各服务商的请求限速 (多个翻译线程共享)
+_PROVIDER_LIMITERS = {
+    "gemini": per_minute(GEMINI_RPM),
+    "openai": per_minute(OPENAI_RPM),
+}
+
+# 长推文切块后并发翻译
+_CHUNK_POOL = ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS, thread_name_prefix="translate-chunk")
+
+# 路由器整体失败 (所有服务商都失败) 后，重试前等待的秒数
+TRANSLATION_RETRY_WAIT = 1
+
+TRANSLATION_CACHE_STATS = {"hits": 0, "misses": 0}
+_TRANSLATION_CACHE_STATS_LOCK = threading.Lock()
+
+# 无需翻译而跳过 AI 调用的次数 {原因: 次数}
+TRANSLATION_SKIP_STATS = {}
+
+
+def _current_model():
+    # 缓存键只使用首选服务商及其模型，其他服务商给出的译文同样可以复用
+    return GEMINI_MODEL if AI_PROVIDER == "gemini" else OPENAI_MODEL
+
+
+def _translation_cache_key(content):
+    raw = json.dumps([AI_PROVIDER, _current_model(), PROMPT_TEMPLATE, content], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _record_cache_result(hit):
+    with _TRANSLATION_CACHE_STATS_LOCK:
+        TRANSLATION_CACHE_STATS["hits" if hit else "misses"] += 1
+    TRANSLATION_CACHE.inc(result="hit" if hit else "miss")
+
+
+def _cache_get(content):
+    """查询翻译缓存并计数，未启用缓存或未命中时返回 None"""
+    if _translation_cache is None:
+        return None
+    try:
+        cached = _translation_cache.get(_translation_cache_key(content))
+    except Exception as e:
+        logger.warning("读取翻译缓存出错: %s", e)
+        cached = None
+    _record_cache_result(cached is not None)
+    return cached
+
+
+def _cache_set(content, translated):
+    if _translation_cache is None:
+        return
+    try:
+        _translation_cache.set(_translation_cache_key(content), translated)
+    except Exception as e:
+        logger.warning("写入翻译缓存出错: %s", e)
+
+
+def get_translation_cache_stats():
+    """返回翻译缓存的命中 / 未命中次数及当前条目数"""
+    with _TRANSLATION_CACHE_STATS_LOCK:
+        stats = dict(TRANSLATION_CACHE_STATS)
+    stats["entries"] = len(_translation_cache) if _translation_cache is not None else 0
+    return stats
+
+
+gauge(
+    "rss_bot_translation_cache_entries", "翻译缓存当前条目数", [],
+    collect=lambda: {(): len(_translation_cache) if _translation_cache is not None else 0},
+)
+
+
+def needs_translation(content):
+    """推文是否需要调用 AI 翻译 (只判断，不计数)"""
+    return not TRANSLATION_SKIP_ENABLED or skip_translation_reason(content) is None
+
+
+def _should_skip(content):
+    """本地判断无需翻译时计数并返回 True (已是中文、没有文字或文字过短)"""
+    if not TRANSLATION_SKIP_ENABLED:
+        return False
+    reason = skip_translation_reason(content)
+    if reason is None:
+        return False
+    with _TRANSLATION_CACHE_STATS_LOCK:
+        TRANSLATION_SKIP_STATS[reason] = TRANSLATION_SKIP_STATS.get(reason, 0) + 1
+    TRANSLATION_SKIPPED.inc(reason=reason)
+    logger.debug("无需翻译 (%s)，跳过 API 调用", reason)
+    return True
+
+
+def get_translation_skip_stats():
+    """返回跳过翻译的次数 {原因: 次数}，原因: empty / chinese / short"""
+    with _TRANSLATION_CACHE_STATS_LOCK:
+        return dict(TRANSLATION_SKIP_STATS)
+
+
+def translate_tweet(content):
+    """
+    使用 AI 翻译推文内容
+    无需翻译时返回空字符串；命中翻译缓存时直接返回，不调用 API
+    """
+    if _should_skip(content):
+        return ""
+
+    cached = _cache_get(content)
+    if cached is not None:
+        logger.debug("命中翻译缓存，跳过 API 调用")
+        return cached
+
+    translated, ok = _translate_content(content)
+
+    # 只缓存成功的翻译结果
+    if ok:
+        _cache_set(content, translated)
+    return translated
+
+
+def _provider_name(provider=AI_PROVIDER):
+    return _PROVIDER_NAMES.get(provider, provider)
+
+
+def _available_providers():
+    """已成功创建客户端的 (服务商, 模型)，按 AI_PROVIDERS 的顺序"""
+    clients = {"gemini": gemini_client, "openai": openai_client}
+    return [(provider, _MODELS[provider]) for provider in AI_PROVIDERS if clients.get(provider) is not None]
+
+
+def _provider_ready():
+    return bool(_ROUTER.providers)
+
+
+def _call_provider(prompt, json_output=False):
+    """通过路由器调用 AI 服务商 (失败时切换、慢时对冲)，返回去除首尾空白的文本，全部失败时抛出异常"""
+    return _ROUTER.call(prompt, json_output)[1]
+
+
+def _request_provider(provider, model, prompt, json_output):
+    """向指定服务商发出一次请求并计数，失败时抛出异常"""
+    try:
+        text = _send_request(provider, model, prompt, json_output)
+    except Exception:
+        TRANSLATION_REQUESTS.inc(provider=provider, result="error")
+        raise
+    TRANSLATION_REQUESTS.inc(provider=provider, result="ok")
+    return text
+
+
+def _send_request(provider, model, prompt, json_output):
+    limiter = _PROVIDER_LIMITERS.get(provider)
+    if limiter:
+        limiter.acquire()
+
+    if provider == "gemini" and gemini_client:
+        config_kwargs = {"temperature": 0.7, "candidate_count": 1}
+        if json_output:
+            config_kwargs["response_mime_type"] = "application/json"
+        response = gemini_client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(**config_kwargs)
+        )
+        if not response.text:
+            raise ValueError("Gemini 返回了空内容")
+        return response.text.strip()
+
+    if provider == "openai" and openai_client:
+        response = openai_client.responses.create(
+            model=model,
+            reasoning={"effort": "medium"},
+            input=[
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ]
+        )
+        if not response.output_text:
+            raise ValueError("OpenAI 返回了空内容")
+        return response.output_text.strip()
+
+    raise RuntimeError(f"未初始化 {_provider_name(provider)} 客户端")
+
+
+# 请求经过路由器: 按延迟和错误率选择服务商，慢请求发出对冲请求
+_ROUTER = ProviderRouter(
+    _available_providers(),
+    _request_provider,
+    hedge=TRANSLATION_HEDGE_ENABLED,
+    hedge_min_delay=TRANSLATION_HEDGE_MIN_DELAY,
+    hedge_max_delay=TRANSLATION_HEDGE_MAX_DELAY,
+    window=PROVIDER_STATS_WINDOW,
+    max_workers=4 * TRANSLATE_WORKERS,
+    on_hedge=lambda provider, result: TRANSLATION_HEDGES.inc(provider=provider, result=result),
+)
+
+
+def get_provider_stats():
+    """各服务商滚动窗口内的统计 {(服务商, 模型): {"count", "error_rate", "p50", "p95"}}"""
+    return _ROUTER.get_stats()
+
+
+def _provider_stat_values(field):
+    return {
+        (provider, model): stats[field]
+        for (provider, model), stats in get_provider_stats().items()
+        if stats[field] is not None
+    }
+
+
+gauge(
+    "rss_bot_provider_latency_p95_seconds", "各翻译服务商滚动窗口内成功请求的 p95 延迟 (秒)", ["provider", "model"],
+    collect=lambda: _provider_stat_values("p95"),
+)
+gauge(
+    "rss_bot_provider_error_rate", "各翻译服务商滚动窗口内的请求错误率", ["provider", "model"],
+    collect=lambda: _provider_stat_values("error_rate"),
+)
+
+
+def _stream_provider(provider, model, prompt):
+    """以流式接口调用指定服务商，逐段产出译文增量，失败时抛出异常"""
+    limiter = _PROVIDER_LIMITERS.get(provider)
+    if limiter:
+        limiter.acquire()
+
+    if provider == "gemini" and gemini_client:
+        chunks = gemini_client.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(temperature=0.7, candidate_count=1)
+        )
+        for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+        return
+
+    if provider == "openai" and openai_client:
+        events = openai_client.responses.create(
+            model=model,
+            reasoning={"effort": "medium"},
+            input=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            stream=True,
+        )
+        for event in events:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif event.type in ("response.failed", "error"):
+                raise RuntimeError(f"OpenAI 流式响应出错: {event.type}")
+        return
+
+    raise RuntimeError(f"未初始化 {_provider_name(provider)} 客户端")
+
+
+def stream_translate_tweet(content, on_update):
+    """
+    流式翻译单条推文，每收到一段译文就以目前累计的译文调用 on_update(text)
+    命中缓存时直接返回；流式请求使用路由器排序中的首选服务商 (不对冲)，
+    失败时退回普通请求 (经过路由器，带重试)
+    无需翻译时返回空字符串，返回最终译文
+    """
+    if _should_skip(content):
+        return ""
+
+    cached = _cache_get(content)
+    if cached is not None:
+        logger.debug("命中翻译缓存，跳过 API 调用")
+        return cached
+
+    if not _provider_ready():
+        return _translate_with_retry(content)[0]
+
+    if len(content) > TRANSLATION_CHUNK_CHARS:
+        # 长推文切块并发翻译，完成后一次性编辑消息
+        translated, ok = _translate_content(content)
+        if ok:
+            _cache_set(content, translated)
+        return translated
+
+    provider, model = _ROUTER.ranked()[0]
+    started = time.monotonic()
+    parts = []
+    try:
+        for delta in _stream_provider(provider, model, PROMPT_TEMPLATE.format(content=content)):
+            parts.append(delta)
+            on_update("".join(parts).strip())
+        translated = "".join(parts).strip()
+        if not translated:
+            raise ValueError(f"{_provider_name(provider)} 返回了空内容")
+    except Exception as e:
+        _ROUTER.record((provider, model), time.monotonic() - started, False)
+        TRANSLATION_REQUESTS.inc(provider=provider, result="error")
+        logger.warning("%s 流式翻译失败，改用普通请求: %s", _provider_name(provider), e, extra={"provider": provider})
+        translated, ok = _translate_content(content)
+        if ok:
+            _cache_set(content, translated)
+        return translated
+
+    _ROUTER.record((provider, model), time.monotonic() - started, True)
+    TRANSLATION_REQUESTS.inc(provider=provider, result="ok")
+    _cache_set(content, translated)
+    return translated
+
+
+def _translate_content(content):
+    """翻译一条推文 (不查缓存)，超长推文切块并发翻译，返回 (文本, 是否成功)"""
+    if len(content) <= TRANSLATION_CHUNK_CHARS:
+        return _translate_with_retry(content)
+
+    # 长文 / 串推: 按段落和句子切块，避免一个超长提示词拖慢或撑爆单次请求
+    chunks = split_text_with_separators(content, TRANSLATION_CHUNK_CHARS)
+    logger.debug("长推文切分为 %d 块并发翻译", len(chunks))
+    results = list(_CHUNK_POOL.map(_translate_with_retry, [chunk for chunk, _ in chunks]))
+    # 译文按原文的分隔 (段落空行 / 换行 / 空格) 拼接，保留段落结构
+    translated = "".join(text + separator for (text, _), (_, separator) in zip(results, chunks))
+    return translated, all(ok for _, ok in results)
+
+
+def _translate_with_retry(content):
+    """
+    调用 AI 翻译，路由器整体失败时再重试 1 次
+    (服务商之间的切换和慢请求对冲已由路由器完成，这里不再逐次退避等待)
+    返回 (文本, 是否成功)
+    """
+    if not _provider_ready():
+        return f"无法翻译 (缺少 {_provider_name()} API Key)", False
+
+    prompt = PROMPT_TEMPLATE.format(content=content)
+
+    for attempt in range(2):
         try:
-            if AI_PROVIDER == "gemini" and local_gemini_client:
-                # 使用 gemini-3-flash-preview 模型
-                response = local_gemini_client.models.generate_content(
-                    model="gemini-3-flash-preview",
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=0.7, 
-                        candidate_count=1
-                    )
-                )
-                if not response.text:
-                    raise ValueError("Gemini 返回了空内容")
-                return response.text.strip()
-                
-            elif AI_PROVIDER == "openai" and local_openai_client:
-                response = local_openai_client.responses.create(
-                    model="gpt-5.2",
-                    reasoning={"effort": "medium"},
-                    input=[
-                        {
-                            "role": "user", 
-                            "content": prompt
-                        }
-                    ]
-                )
-                if not response.output_text:
-                    raise ValueError("OpenAI 返回了空内容")
-                return response.output_text.strip()
-                
+            return _call_provider(prompt), True
         except Exception as e:
-            if attempt < max_retries:
-                wait_time = base_wait_time * (attempt + 1)
-                provider_name = "Gemini" if AI_PROVIDER == "gemini" else "OpenAI"
-                print(f"{provider_name} 翻译失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                print(f"等待 {wait_time} 秒后重试...")
-                time.sleep(wait_time)
+            # 按路由器实际失败的服务商计数 (配置了多个服务商时不一定是 AI_PROVIDER)
+            provider = getattr(e, "provider", None) or AI_PROVIDER
+            if attempt == 0:
+                TRANSLATION_RETRIES.inc(provider=provider)
+                logger.warning(
+                    "翻译失败，%d 秒后重试: %s", TRANSLATION_RETRY_WAIT, e, extra={"provider": provider},
+                )
+                time.sleep(TRANSLATION_RETRY_WAIT)
             else:
-                provider_name = "Gemini" if AI_PROVIDER == "gemini" else "OpenAI"
-                print(f"{provider_name} 翻译最终失败: {e}")
-                return f"翻译失败: {str(e)}"
-    
-    return "翻译失败 (未知错误)"
+                logger.error("翻译最终失败: %s", e, extra={"provider": provider})
+                TRANSLATION_FAILURES.inc(provider=provider)
+                return f"翻译失败: {str(e)}", False
+
+
+def _estimate_tokens(text):
+    # 粗略估算: 英文约 4 字节/token，中文约 3 字节/字，宁可高估
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def _split_batches(items):
+    """按 token 预算和条数上限把 (序号, 内容) 分组"""
+    batches = []
+    current = []
+    current_tokens = _estimate_tokens(BATCH_PROMPT_TEMPLATE)
+    for index, content in items:
+        tokens = _estimate_tokens(json.dumps(content, ensure_ascii=False))
+        if current and (
+            current_tokens + tokens > TRANSLATION_BATCH_TOKEN_BUDGET
+            or len(current) >= TRANSLATION_BATCH_MAX_ITEMS
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = _estimate_tokens(BATCH_PROMPT_TEMPLATE)
+        current.append((index, content))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _parse_batch_response(text, expected):
+    """解析批量翻译结果，返回长度为 expected 的列表，无法解析的位置为 None"""
+    text = text.strip()
+    # 去掉模型可能附带的 ```json 代码块标记
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [None] * expected
+
+    if isinstance(data, dict):
+        # 兼容 {"translations": [...]} 这类包装
+        data = next((value for value in data.values() if isinstance(value, list)), None)
+    if not isinstance(data, list) or len(data) != expected:
+        return [None] * expected
+
+    return [item.strip() if isinstance(item, str) and item.strip() else None for item in data]
+
+
+def _translate_batch(contents):
+    """一次请求翻译多条推文，返回与 contents 等长的列表，失败的位置为 None"""
+    prompt = BATCH_PROMPT_TEMPLATE.format(
+        count=len(contents),
+        contents=json.dumps(contents, ensure_ascii=False, indent=1),
+    )
+    try:
+        text = _call_provider(prompt, json_output=True)
+    except Exception as e:
+        logger.warning("批量翻译失败，将逐条翻译: %s", e, extra={"provider": AI_PROVIDER})
+        return [None] * len(contents)
+    return _parse_batch_response(text, len(contents))
+
+
+def translate_tweets(contents):
+    """
+    批量翻译多条推文，返回与 contents 顺序一致的翻译列表
+    多条推文打包成一个 JSON 数组请求，无法解析的条目退回逐条翻译；无需翻译的条目为空字符串
+    """
+    results = [None] * len(contents)
+    if not contents:
+        return results
+
+    pending = []
+    for index, content in enumerate(contents):
+        if _should_skip(content):
+            results[index] = ""
+            continue
+        cached = _cache_get(content)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append((index, content))
+
+    # 长推文不参与批量翻译，单独切块翻译
+    batchable = [(index, content) for index, content in pending if len(content) <= TRANSLATION_CHUNK_CHARS]
+    if _provider_ready() and len(batchable) > 1:
+        for batch in _split_batches(batchable):
+            if len(batch) == 1:
+                continue
+            logger.debug("批量翻译 %d 条推文", len(batch))
+            translations = _translate_batch([content for _, content in batch])
+            for (index, content), translated in zip(batch, translations):
+                if translated is None:
+                    continue
+                results[index] = translated
+                _cache_set(content, translated)
+
+    # 批量失败或单独成批的条目逐条翻译 (缓存已查过，直接调用 API)
+    for index, content in pending:
+        if results[index] is not None:
+            continue
+        translated, ok = _translate_content(content)
+        if ok:
+            _cache_set(content, translated)
+        results[index] = translated
+
+    return results